@@ -1,4 +1,4 @@
-from gale_shapley import run_experiment, print_test_result
+from gale_shapley import run_experiment, run_benchmark, print_test_result
 import math
 
 print("-" * 50 + "\nRunning experiments")
@@ -19,6 +19,8 @@ print_test_result(result)
 # Adjust the range for whatever your computer can handle
 # or control-C to stop the experiment when you see the pattern
 # Notice that it gets slower PER STUDENT
+# To measure how much slower, run `python benchmark.py --report scaling.html`,
+#   which fits a complexity exponent to each algorithm
 
 print("\nTest run speed")
 for i in range(1, 31):
@@ -34,6 +36,17 @@ for i in range(1, 31):
     bar = "▇" * round(avg_time * 0.2)
     print(f"{student_count:10}: {time_per_student:.4f} ms/student {bar}")
 
+# Random preferences are the easy case: only about n*ln(n) proposals
+# Hard instances (see instances.py) need up to n^2 - n + 1, so compare the two
+#   to see how much slower a match can get than it usually is
+
+print("\nTest worst-case speed (ms/student: random, identical lists, worst case)")
+for i in range(1, 11):
+    student_count = 10 * i
+    results = run_benchmark(student_count, run_count=5)
+    times = [results[name]["time"] / student_count for name in results]
+    print(f"{student_count:10}: " + "  ".join(f"{t:.4f}" for t in times))
+
 # A few asserts to verify that
 # * Naive is unsatisfying but fair
 # * Gale-Shapley makes more people happy, but is unfair to group B
@@ -57,3 +70,11 @@ print_test_result(gs_result)
 assert gs_result["a"] > gs_result["b"], "We expect GS algorithm to be biased in favor of group A"
 assert math.isclose(
     gs_result["all"], 0.812, abs_tol=0.05), "We expect an average of about .812 for this size group"
+
+# Gale-Shapley is stable, but how much happiness does that cost?
+# Maximum welfare makes everyone as happy as possible in total, stable or not
+mw_result = run_experiment(
+    student_count=20, run_count=100, matchmaking_fxn="make_max_welfare_partnerships")
+print_test_result(mw_result)
+
+assert mw_result["all"] >= gs_result["all"], "Nothing can beat maximum welfare on average"
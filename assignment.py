@@ -0,0 +1,157 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Maximum-welfare assignment: a baseline to compare Gale-Shapley against.
+
+Gale-Shapley guarantees a *stable* matching, but not the happiest one.
+The maximum-welfare matching instead pairs students so that the total of
+everyone's rating of their partner (both A's and B's ratings) is as high
+as possible, whether or not the result is stable. Comparing the two shows
+how much welfare stability costs, and how unstable the happiest matching is.
+
+It is found with the Hungarian algorithm, in O(n^3) time.
+Use engines.get_kernel("assignment") to get the fastest available version.
+"""
+
+import math
+import random
+
+from engines import Workspace, get_kernel
+from gale_shapley import derive_seed
+
+
+def welfare_costs(tables) -> list[list[int]]:
+    """
+    Returns the cost matrix whose minimum-cost assignment has maximum welfare.
+
+    cost[i][j] is minus the combined rating of the pair: A student i's rating
+    of B student j plus B student j's rating of A student i.
+    """
+    if len(tables.prefs_a) != len(tables.prefs_b):
+        raise ValueError("Both groups must be the same size to assign everyone a partner")
+    return [[-(rank_a + tables.ranks_b[j][i]) for j, rank_a in enumerate(row)]
+            for i, row in enumerate(tables.ranks_a)]
+
+
+def hungarian(cost: list[list[int]]) -> list[int]:
+    """
+    Returns the minimum-cost assignment of rows to columns of a square matrix.
+
+    This is the shortest-augmenting-path form of the Hungarian algorithm:
+    rows are added one at a time, each by a Dijkstra-like search for the
+    cheapest way to reshuffle the rows already assigned.
+
+    Before that, every column's potential is set to its smallest cost, and each
+    row that costs exactly that much for some still-free column simply takes it.
+    This already satisfies the algorithm's conditions, so on random preferences
+    many rows are settled without a search, and only the rest need one.
+
+    Returns:
+        list[int]: result[i] is the column assigned to row i.
+    """
+    n = len(cost)
+    # Rows and columns are numbered from 1; column 0 is a dummy used by the search
+    u = [0] * (n + 1)
+    v = [0] * (n + 1)
+    row_of = [0] * (n + 1)
+    way = [0] * (n + 1)
+
+    # Column reduction and greedy start (see above)
+    for j in range(1, n + 1):
+        v[j] = min(cost[i][j - 1] for i in range(n))
+    assigned = [False] * (n + 1)
+    for i in range(1, n + 1):
+        row = cost[i - 1]
+        for j in range(1, n + 1):
+            if row_of[j] == 0 and row[j - 1] == v[j]:
+                row_of[j] = i
+                assigned[i] = True
+                break
+
+    for i in range(1, n + 1):
+        if assigned[i]:
+            continue
+        row_of[0] = i
+        j0 = 0
+        min_slack = [math.inf] * (n + 1)
+        used = [False] * (n + 1)
+        while True:
+            used[j0] = True
+            i0 = row_of[j0]
+            row = cost[i0 - 1]
+            delta = math.inf
+            j1 = 0
+            for j in range(1, n + 1):
+                if not used[j]:
+                    slack = row[j - 1] - u[i0] - v[j]
+                    if slack < min_slack[j]:
+                        min_slack[j] = slack
+                        way[j] = j0
+                    if min_slack[j] < delta:
+                        delta = min_slack[j]
+                        j1 = j
+            for j in range(n + 1):
+                if used[j]:
+                    u[row_of[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            j0 = j1
+            # Stop as soon as we reach a free column
+            if row_of[j0] == 0:
+                break
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+
+    result = [-1] * n
+    for j in range(1, n + 1):
+        result[row_of[j] - 1] = j - 1
+    return result
+
+
+def max_welfare_python(tables) -> list[int]:
+    """
+    Returns partner_a for the matching with the highest total rating.
+
+    partner_a[i] is the index of A student i's partner in group B.
+    """
+    return hungarian(welfare_costs(tables))
+
+
+def compare_with_gale_shapley(student_count: int = 50, run_count: int = 10,
+                              seed: int = 0) -> dict[str, dict[str, float]]:
+    """
+    Compare naive, Gale-Shapley and maximum-welfare matchings on the same random instances.
+
+    Returns:
+        dict: For each of "make_naive_partnerships", "make_gale_shapely_partnerships"
+            and "make_max_welfare_partnerships", the average "a", "b" and "all"
+            happiness and the average number of "blocking_pairs" per run
+            (0 means every matching was stable).
+    """
+    workspace = Workspace(student_count)
+    fxns = {
+        "make_naive_partnerships": workspace.match_naive,
+        "make_gale_shapely_partnerships": workspace.match,
+        "make_max_welfare_partnerships": workspace.match_max_welfare,
+    }
+    totals = {name: {"a": 0.0, "b": 0.0, "all": 0.0, "blocking_pairs": 0.0} for name in fxns}
+
+    stability = get_kernel("stability", student_count)
+    rng = random.Random()
+    for run in range(run_count):
+        rng.seed(derive_seed(seed, run))
+        workspace.randomize(rng)
+        tables = workspace.to_tables()
+        for name, fxn in fxns.items():
+            fxn()
+            happiness_a, happiness_b, happiness_all = workspace.happiness()
+            totals[name]["a"] += happiness_a / run_count
+            totals[name]["b"] += happiness_b / run_count
+            totals[name]["all"] += happiness_all / run_count
+            totals[name]["blocking_pairs"] += len(stability(tables, workspace.partner_a)) / run_count
+    return totals
@@ -0,0 +1,483 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Benchmarks for the matching code.
+
+Run this file directly to print the results:
+    python benchmark.py
+or to also write a scaling report with fitted complexity curves:
+    python benchmark.py --report scaling.html
+"""
+
+import argparse
+import html
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import gale_shapley
+import instances
+
+# How long `import gale_shapley` plus one 10x10 match may take, in milliseconds.
+# Python's own startup is not counted.
+# NumPy alone takes longer than this to import, so the budget also catches
+# anything that starts importing it eagerly.
+STARTUP_BUDGET_MS = 100
+
+# The script timed by measure_startup(), run in a fresh interpreter each time
+_STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import gale_shapley
+names_a = ["A" + str(i) for i in range({size})]
+names_b = ["B" + str(i) for i in range({size})]
+group = gale_shapley.Group(names_a, names_b)
+group.make_gale_shapely_partnerships()
+gale_shapley.engines.match_group(group)
+stop = time.perf_counter()
+print((stop - start) * 1000, "numpy" in sys.modules)
+"""
+
+
+def measure_startup(size: int = 10, repeats: int = 5) -> dict[str, float | bool]:
+    """
+    Returns how long a fresh interpreter takes to import gale_shapley and
+    run a size x size match, both with Group and with the fast engines.
+
+    Each measurement runs in a new process so nothing is already imported.
+    The fastest of several repeats is reported, since slower ones
+    are usually caused by other work on the machine.
+
+    Returns:
+        dict: "time" is the fastest run in milliseconds,
+            and "numpy_imported" says whether NumPy got imported along the way.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    script = _STARTUP_SCRIPT.format(size=size)
+
+    times = []
+    numpy_imported = False
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", script], cwd=here,
+                                capture_output=True, text=True, check=True).stdout
+        elapsed, imported = output.split()
+        times.append(float(elapsed))
+        numpy_imported = numpy_imported or imported == "True"
+
+    return {
+        "size": size,
+        "time": min(times),
+        "numpy_imported": numpy_imported,
+    }
+
+
+def measure_run_allocations(size: int, runs: int = 5,
+                            use_workspace: bool = True) -> int:
+    """
+    Returns the most memory (in bytes) that one run of an experiment allocated.
+
+    A run is: randomize the ratings, make Gale-Shapley partnerships
+    and compute the happiness, as in run_experiment().
+    Memory is measured with tracemalloc as the peak above what was already
+    allocated before the run, so temporary lists count even if they are freed
+    before the run ends.
+
+    Args:
+        size (int): The number of students in each group.
+        runs (int): How many runs to measure (after one warm-up run).
+        use_workspace (bool): Run with an engines.Workspace (True) or a Group (False).
+    """
+    rng = random.Random(0)
+    if use_workspace:
+        workspace = gale_shapley.engines.Workspace(size)
+
+        def run():
+            workspace.randomize(rng)
+            workspace.match()
+            workspace.happiness()
+    else:
+        group = gale_shapley.make_experiment_group(size)
+
+        def run():
+            group.randomize_ratings(rng)
+            group.make_gale_shapely_partnerships()
+            gale_shapley.calculate_average_happiness(group.students_a)
+            gale_shapley.calculate_average_happiness(group.students_b)
+            gale_shapley.calculate_average_happiness(group.all_students)
+
+    tracemalloc.start()
+    try:
+        run()
+        worst = 0
+        for _ in range(runs):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            run()
+            worst = max(worst, tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return worst
+
+
+# ---------------------------
+# Scaling analysis
+# ---------------------------
+
+def _setup_group(size: int, rng: random.Random, preferences: str = "random"):
+    """
+    Returns a function that runs Group.make_gale_shapely_partnerships
+    on a fresh instance and returns the proposal count.
+    """
+    group = gale_shapley.make_experiment_group(size)
+    if preferences == "random":
+        group.randomize_ratings(rng)
+    else:
+        instances.set_group_ratings(group, instances.hard_instance(preferences, size, rng))
+
+    def run():
+        group.make_gale_shapely_partnerships()
+        return group.proposal_count
+    return run
+
+
+def _setup_kernel(backend: str):
+    """
+    Returns a setup function for the "match" kernel of one engines backend.
+    """
+    def setup(size: int, rng: random.Random, preferences: str = "random"):
+        if preferences == "random":
+            workspace = gale_shapley.engines.Workspace(size)
+            workspace.randomize(rng)
+            tables = workspace.to_tables()
+        else:
+            tables = instances.hard_instance(preferences, size, rng)
+        kernel = gale_shapley.engines.get_kernel("match", backend=backend)
+
+        def run():
+            # Throw away cached arrays afterwards, so every run rebuilds
+            #   (and is timed and measured building) its own
+            proposals = kernel(tables)[1]
+            tables.cache.clear()
+            return proposals
+        return run
+    return setup
+
+
+def _setup_workspace(size: int, rng: random.Random, preferences: str = "random"):
+    """
+    Returns a function that runs Workspace.match on a fresh instance.
+    """
+    workspace = gale_shapley.engines.Workspace(size)
+    if preferences == "random":
+        workspace.randomize(rng)
+    else:
+        workspace.load(instances.hard_instance(preferences, size, rng))
+    return workspace.match
+
+
+def sweep_algorithms() -> dict:
+    """
+    Returns {name: setup function} for every algorithm that can run on this machine.
+
+    A setup function takes (size, rng, preferences) and returns a function that
+    makes one matching on a fresh instance of that size and returns its proposal count.
+    preferences is "random" or one of instances.HARD_INSTANCES (renumbered with rng).
+    """
+    algorithms = {
+        "Group.make_gale_shapely_partnerships": _setup_group,
+        "Workspace.match": _setup_workspace,
+    }
+    for backend in gale_shapley.engines.available_backends("match"):
+        algorithms[f"engines match ({backend})"] = _setup_kernel(backend)
+    return algorithms
+
+
+def scaling_sweep(sizes: list[int] = (25, 50, 100, 200, 400), runs: int = 5,
+                  algorithms: list[str] | None = None, seed: int = 0,
+                  preferences: str = "random") -> dict:
+    """
+    Time each algorithm over a range of group sizes.
+
+    Random instances only need about n*ln(n) proposals, so sweep with
+    preferences="worst_case" as well to see how an algorithm scales when
+    it has to make all n^2 - n + 1 of them.
+
+    For every algorithm and size this records, over `runs` instances:
+        "time": the median time to make one matching, in milliseconds,
+        "proposals": the mean number of proposals,
+        "memory": the peak memory one matching allocated, in bytes
+            (measured in a separate tracemalloc run, since tracing slows things down).
+    Setting up the random instance is not counted.
+
+    Args:
+        sizes (list[int]): The numbers of students per group to try.
+        runs (int): How many random instances to time at each size.
+        algorithms (list[str] | None): Names from sweep_algorithms(), or None for all.
+        seed (int): Seed for the random instances, so sweeps are repeatable.
+        preferences (str): "random", or one of instances.HARD_INSTANCES.
+
+    Returns:
+        dict: {algorithm name: {"sizes": [...], "time": [...], "proposals": [...], "memory": [...]}}
+    """
+    available = sweep_algorithms()
+    if algorithms is None:
+        algorithms = list(available)
+
+    results = {}
+    for name in algorithms:
+        setup = available[name]
+        rows = {"sizes": [], "time": [], "proposals": [], "memory": []}
+        for size in sizes:
+            rng = random.Random(gale_shapley.derive_seed(seed, size))
+            times = []
+            proposals = []
+            for _ in range(runs):
+                run = setup(size, rng, preferences)
+                start = time.perf_counter()
+                proposals.append(run())
+                times.append((time.perf_counter() - start) * 1000)
+
+            # Run once before measuring, so one-off costs (like filling caches)
+            #   are not mistaken for memory that grows with size
+            run = setup(size, rng, preferences)
+            tracemalloc.start()
+            try:
+                run()
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                run()
+                memory = tracemalloc.get_traced_memory()[1] - before
+            finally:
+                tracemalloc.stop()
+
+            rows["sizes"].append(size)
+            rows["time"].append(statistics.median(times))
+            rows["proposals"].append(statistics.mean(proposals))
+            rows["memory"].append(memory)
+        results[name] = rows
+    return results
+
+
+def fit_exponent(sizes: list[float], values: list[float]) -> float:
+    """
+    Returns the empirical complexity exponent k of values ~ c * size^k.
+
+    This is the slope of the least-squares line through (log size, log value).
+    Values that are not positive are skipped. Returns nan if fewer than
+    two points are left.
+    """
+    points = [(math.log(n), math.log(v)) for n, v in zip(sizes, values) if n > 0 and v > 0]
+    if len(points) < 2:
+        return math.nan
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return math.nan
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def fit_exponents(results: dict) -> dict[str, dict[str, float]]:
+    """
+    Returns {algorithm name: {"time": k, "proposals": k, "memory": k}} for a scaling_sweep result.
+    """
+    return {name: {metric: fit_exponent(rows["sizes"], rows[metric])
+                   for metric in ["time", "proposals", "memory"]}
+            for name, rows in results.items()}
+
+
+# Labels and units for each measured metric
+_METRICS = {
+    "time": "Time per matching (ms)",
+    "proposals": "Proposals",
+    "memory": "Peak memory (bytes)",
+}
+
+_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b",
+           "#e377c2", "#7f7f7f"]
+
+
+def _svg_plot(results: dict, metric: str, width: int = 560, height: int = 360) -> str:
+    """
+    Returns an SVG log-log plot of one metric for every algorithm.
+    """
+    margin = 60
+    points = [(n, v) for rows in results.values()
+              for n, v in zip(rows["sizes"], rows[metric]) if n > 0 and v > 0]
+    if not points:
+        return ""
+    min_x = math.log10(min(n for n, _ in points))
+    max_x = math.log10(max(n for n, _ in points))
+    min_y = math.log10(min(v for _, v in points))
+    max_y = math.log10(max(v for _, v in points))
+    span_x = (max_x - min_x) or 1
+    span_y = (max_y - min_y) or 1
+
+    def x(n):
+        return margin + (math.log10(n) - min_x) / span_x * (width - 2 * margin)
+
+    def y(v):
+        return height - margin - (math.log10(v) - min_y) / span_y * (height - 2 * margin)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="sans-serif" font-size="12">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        f'<text x="{width / 2}" y="20" text-anchor="middle">{html.escape(_METRICS[metric])} '
+        f'(log-log)</text>',
+        f'<line x1="{margin}" y1="{height - margin}" x2="{width - margin}" '
+        f'y2="{height - margin}" stroke="black"/>',
+        f'<line x1="{margin}" y1="{margin}" x2="{margin}" y2="{height - margin}" stroke="black"/>',
+        f'<text x="{width / 2}" y="{height - 20}" text-anchor="middle">students per group</text>',
+    ]
+    for n in sorted({n for n, _ in points}):
+        parts.append(f'<text x="{x(n):.1f}" y="{height - margin + 16}" '
+                     f'text-anchor="middle">{n}</text>')
+    for v in sorted({min(v for _, v in points), max(v for _, v in points)}):
+        parts.append(f'<text x="{margin - 6}" y="{y(v):.1f}" text-anchor="end">{v:.3g}</text>')
+
+    for index, (name, rows) in enumerate(results.items()):
+        color = _COLORS[index % len(_COLORS)]
+        line = [(x(n), y(v)) for n, v in zip(rows["sizes"], rows[metric]) if n > 0 and v > 0]
+        if not line:
+            continue
+        path = " ".join(f"{px:.1f},{py:.1f}" for px, py in line)
+        parts.append(f'<polyline points="{path}" fill="none" stroke="{color}" stroke-width="2"/>')
+        for px, py in line:
+            parts.append(f'<circle cx="{px:.1f}" cy="{py:.1f}" r="3" fill="{color}"/>')
+        parts.append(f'<text x="{margin + 10}" y="{margin + 16 * index}" '
+                     f'fill="{color}">{html.escape(name)}</text>')
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+
+def _exponent_text(k: float) -> str:
+    return "n/a" if math.isnan(k) else f"{k:.2f}"
+
+
+def write_report(results: dict, path: str):
+    """
+    Write a scaling_sweep result as a report with plots and fitted exponents.
+
+    A path ending in .html gives one HTML file with the plots inlined.
+    Any other path (e.g. .md) gives a Markdown file, with each plot saved
+    next to it as an .svg file.
+    """
+    exponents = fit_exponents(results)
+    as_html = path.endswith(".html")
+    stem = os.path.splitext(path)[0]
+
+    lines = ["# Scaling report", "",
+             "Each exponent k is fitted so that the measurement grows like n^k, "
+             "where n is the number of students per group. "
+             "For example, k = 2 for time means doubling n makes a matching about 4 times slower.",
+             "",
+             "## Fitted exponents", "",
+             "| Algorithm | time | proposals | memory |",
+             "|---|---|---|---|"]
+    for name, fitted in exponents.items():
+        lines.append(f"| {name} | {_exponent_text(fitted['time'])} | "
+                     f"{_exponent_text(fitted['proposals'])} | {_exponent_text(fitted['memory'])} |")
+
+    for metric, label in _METRICS.items():
+        lines += ["", f"## {label}", ""]
+        svg = _svg_plot(results, metric)
+        if as_html:
+            lines.append(svg)
+        else:
+            svg_path = f"{stem}-{metric}.svg"
+            with open(svg_path, "w", encoding="utf-8") as f:
+                f.write(svg)
+            lines.append(f"![{label}]({os.path.basename(svg_path)})")
+
+    lines += ["", "## Measurements", ""]
+    for name, rows in results.items():
+        lines += [f"### {name}", "",
+                  "| n | time (ms) | proposals | memory (bytes) |",
+                  "|---|---|---|---|"]
+        for n, t, p, m in zip(rows["sizes"], rows["time"], rows["proposals"], rows["memory"]):
+            lines.append(f"| {n} | {t:.3f} | {p:.0f} | {m} |")
+        lines.append("")
+
+    text = "\n".join(lines)
+    if as_html:
+        text = _markdown_to_html(text)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _markdown_to_html(text: str) -> str:
+    """
+    Convert the small subset of Markdown that write_report() produces into HTML.
+    """
+    body = []
+    table = []
+
+    def flush_table():
+        if table:
+            rows = [row.strip("|").split("|") for row in table if not row.startswith("|---")]
+            body.append("<table border=\"1\" cellpadding=\"4\">")
+            for index, cells in enumerate(rows):
+                tag = "th" if index == 0 else "td"
+                body.append("<tr>" + "".join(f"<{tag}>{html.escape(c.strip())}</{tag}>"
+                                             for c in cells) + "</tr>")
+            body.append("</table>")
+            table.clear()
+
+    for line in text.split("\n"):
+        if line.startswith("|"):
+            table.append(line)
+            continue
+        flush_table()
+        if line.startswith("### "):
+            body.append(f"<h3>{html.escape(line[4:])}</h3>")
+        elif line.startswith("## "):
+            body.append(f"<h2>{html.escape(line[3:])}</h2>")
+        elif line.startswith("# "):
+            body.append(f"<h1>{html.escape(line[2:])}</h1>")
+        elif line.startswith("<"):
+            body.append(line)
+        elif line:
+            body.append(f"<p>{html.escape(line)}</p>")
+    flush_table()
+    return ("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Scaling report</title>"
+            "</head><body>\n" + "\n".join(body) + "\n</body></html>\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the matching code.")
+    parser.add_argument("--report", help="write a scaling report to this .html or .md file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 50, 100, 200, 400],
+                        help="students per group to sweep over")
+    parser.add_argument("--runs", type=int, default=5, help="instances per size")
+    args = parser.parse_args()
+
+    result = measure_startup()
+    print(f"Import + {result['size']}x{result['size']} match: {result['time']:.2f} ms "
+          f"(budget {STARTUP_BUDGET_MS} ms)")
+    print(f"NumPy imported: {result['numpy_imported']}")
+
+    print("\nMemory allocated per experiment run")
+    for size in [25, 50, 100, 200]:
+        group_bytes = measure_run_allocations(size, use_workspace=False)
+        workspace_bytes = measure_run_allocations(size, use_workspace=True)
+        print(f"{size:10}: Group {group_bytes:10} bytes, Workspace {workspace_bytes:6} bytes")
+
+    print("\nScaling (fitted exponent k: grows like n^k)")
+    results = {}
+    for preferences in ["random", "worst_case"]:
+        for name, rows in scaling_sweep(args.sizes, args.runs, preferences=preferences).items():
+            results[f"{name} ({preferences})"] = rows
+    for name, fitted in fit_exponents(results).items():
+        print(f"{name:52} time {_exponent_text(fitted['time']):>5}, "
+              f"proposals {_exponent_text(fitted['proposals']):>5}, "
+              f"memory {_exponent_text(fitted['memory']):>5}")
+    if args.report:
+        write_report(results, args.report)
+        print(f"Report written to {args.report}")
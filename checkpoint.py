@@ -0,0 +1,245 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Checkpointing long matches so that they can be resumed after a crash.
+
+A match on very large groups can take long enough that losing a worker means
+losing a lot of work. gale_shapley_checkpointed() runs the same deferred
+acceptance as engines.gale_shapley_python(), but every so often it saves
+everything needed to carry on:
+    partner_a, partner_b:   the current partnerships
+    next_choice:            how far down their list each A student has proposed
+    free:                   the stack of A students still to propose
+    proposals:              how many proposals have been made so far
+Run it again with the same preferences and file, and it carries on from the
+latest checkpoint. Because the free stack is saved in order, it makes exactly
+the same proposals as an uninterrupted run, so it gets the same partnerships
+and proposal count.
+
+The file is memory-mapped and written in place, so saving costs about as much
+as copying four arrays. It has two slots, used in turn, each with a CRC of
+its contents. A crash in the middle of saving therefore only damages the
+slot being written, and resuming falls back to the other one.
+
+The file's header records a fingerprint (a CRC) of the preferences, so that
+resuming with a different instance of the same size is refused rather than
+carrying on from, or returning, a match of the wrong preferences.
+"""
+
+import array
+import mmap
+import os
+import struct
+import zlib
+
+from engines import PreferenceTables, propose_until_done
+
+# File header: magic, format version, group A size, group B size, preferences fingerprint
+_HEADER = struct.Struct("<4sHxxIII")
+_MAGIC = b"GSCK"
+_VERSION = 2
+
+# Slot header: sequence number (0 = never written), proposals, free stack length, CRC
+_SLOT = struct.Struct("<QQII")
+
+# Every array is stored as 32-bit signed ints
+_ITEM = array.array("i").itemsize
+
+
+def fingerprint(tables: PreferenceTables) -> int:
+    """
+    Returns a CRC of both groups' preference lists, to tell instances apart.
+    """
+    crc = 0
+    for prefs in (tables.prefs_a, tables.prefs_b):
+        # The lengths go first, so that moving a student between lists changes the CRC
+        crc = zlib.crc32(array.array("i", [len(pref) for pref in prefs]).tobytes(), crc)
+        for pref in prefs:
+            crc = zlib.crc32(array.array("i", pref).tobytes(), crc)
+    return crc
+
+
+class Checkpoint:
+    """
+    A memory-mapped checkpoint file for one match.
+
+    The file records the group sizes and a fingerprint of the preferences
+    (see fingerprint()), and refuses to open for any other instance.
+
+    Attributes:
+        path (str): The checkpoint file.
+        size_a (int): The number of students in group A.
+        size_b (int): The number of students in group B.
+        prefs_fingerprint (int): The fingerprint of the instance being matched.
+        sequence (int): The number of the latest checkpoint saved (0 if none).
+    """
+
+    def __init__(self, path: str, size_a: int, size_b: int, prefs_fingerprint: int = 0):
+        """
+        Open the checkpoint file at path, creating it if it doesn't exist.
+
+        Raises ValueError if the file exists but is for different group sizes
+            or a different fingerprint.
+        """
+        self.path = path
+        self.size_a = size_a
+        self.size_b = size_b
+        self.prefs_fingerprint = prefs_fingerprint
+        # partner_a, next_choice and free have size_a entries, partner_b has size_b
+        self._data_size = (3 * size_a + size_b) * _ITEM
+        self._slot_size = _SLOT.size + self._data_size
+        file_size = _HEADER.size + 2 * self._slot_size
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            header = self._file.read(_HEADER.size)
+            if len(header) < _HEADER.size or _HEADER.unpack(header)[:4] != (_MAGIC, _VERSION, size_a, size_b):
+                self._file.close()
+                raise ValueError(f"{path}: not a checkpoint for groups of {size_a} and {size_b}")
+            if _HEADER.unpack(header)[4] != prefs_fingerprint:
+                self._file.close()
+                raise ValueError(f"{path}: a checkpoint for different preferences "
+                                 "(delete it to start this match afresh)")
+            if os.path.getsize(path) < file_size:
+                self._file.truncate(file_size)
+        else:
+            self._file.truncate(file_size)
+            self._file.write(_HEADER.pack(_MAGIC, _VERSION, size_a, size_b, prefs_fingerprint))
+            self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), file_size)
+
+        self.sequence = 0
+        latest = self._latest_slot()
+        if latest is not None:
+            self.sequence = latest[0]
+
+    def _slot_offset(self, sequence: int) -> int:
+        return _HEADER.size + (sequence % 2) * self._slot_size
+
+    def _latest_slot(self) -> tuple[int, int, int, int] | None:
+        """
+        Returns (sequence, proposals, free count, data offset) of the newest intact slot, or None.
+        """
+        latest = None
+        for slot in range(2):
+            offset = _HEADER.size + slot * self._slot_size
+            sequence, proposals, free_count, crc = _SLOT.unpack_from(self._map, offset)
+            start = offset + _SLOT.size
+            if sequence == 0 or free_count > self.size_a:
+                continue
+            if zlib.crc32(self._map[start:start + self._data_size],
+                          zlib.crc32(struct.pack("<QQI", sequence, proposals, free_count))) != crc:
+                continue
+            if latest is None or sequence > latest[0]:
+                latest = (sequence, proposals, free_count, start)
+        return latest
+
+    def save(self, partner_a: list[int], partner_b: list[int], next_choice: list[int],
+             free: list[int], proposals: int, sync: bool = True):
+        """
+        Save the state of a match into the older of the two slots.
+
+        With sync, waits until the checkpoint is on disk (an msync), so that it
+            survives the whole machine going down rather than just this process.
+        """
+        sequence = self.sequence + 1
+        offset = self._slot_offset(sequence)
+        start = offset + _SLOT.size
+
+        # Each array is written straight into the mapped file
+        position = start
+        for values, size in ((partner_a, self.size_a), (partner_b, self.size_b),
+                             (next_choice, self.size_a), (free, self.size_a)):
+            data = array.array("i", values).tobytes()
+            self._map[position:position + len(data)] = data
+            position += size * _ITEM
+
+        # The slot header goes last: until it is written, this slot fails its
+        #   CRC check, so a crash here just falls back to the other slot
+        crc = zlib.crc32(self._map[start:start + self._data_size],
+                         zlib.crc32(struct.pack("<QQI", sequence, proposals, len(free))))
+        _SLOT.pack_into(self._map, offset, sequence, proposals, len(free), crc)
+        if sync:
+            self._map.flush()
+        self.sequence = sequence
+
+    def load(self) -> tuple[list[int], list[int], list[int], list[int], int] | None:
+        """
+        Returns the latest intact checkpoint, or None if there is none.
+
+        Returns:
+            (partner_a, partner_b, next_choice, free, proposals), as passed to save().
+        """
+        latest = self._latest_slot()
+        if latest is None:
+            return None
+        _, proposals, free_count, position = latest
+
+        arrays = []
+        for size in (self.size_a, self.size_b, self.size_a, self.size_a):
+            values = array.array("i")
+            values.frombytes(self._map[position:position + size * _ITEM])
+            arrays.append(values.tolist())
+            position += size * _ITEM
+        partner_a, partner_b, next_choice, free = arrays
+        return partner_a, partner_b, next_choice, free[:free_count], proposals
+
+    def close(self):
+        """
+        Unmap and close the checkpoint file.
+        """
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'Checkpoint':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def gale_shapley_checkpointed(tables: PreferenceTables, path: str,
+                              every: int | None = None, sync: bool = True) -> tuple[list[int], int]:
+    """
+    Run deferred acceptance like engines.gale_shapley_python(), checkpointing to path.
+
+    If path already holds a checkpoint for these preferences, carries on from it.
+    The checkpoint file is left in place when the match finishes (holding the
+    finished state). If it holds a checkpoint for different preferences,
+    raises ValueError rather than resuming someone else's match.
+
+    Args:
+        tables (PreferenceTables): The preferences.
+        path (str): The checkpoint file.
+        every (int | None): Save a checkpoint about every this many proposals.
+            The default, one per A student, keeps the cost of saving
+            (proportional to the group size) at O(1) per proposal.
+        sync (bool): Wait for each checkpoint to reach the disk (see Checkpoint.save()).
+
+    Returns:
+        (partner_a, proposals): as for engines.gale_shapley_python().
+    """
+    size_a = len(tables.prefs_a)
+    size_b = len(tables.prefs_b)
+    every = every or max(size_a, 1)
+
+    with Checkpoint(path, size_a, size_b, fingerprint(tables)) as checkpoint:
+        state = checkpoint.load()
+        if state is None:
+            partner_a = [-1] * size_a
+            partner_b = [-1] * size_b
+            next_choice = [0] * size_a
+            # Reversed so that A0 proposes first, like gale_shapley_python()
+            free = list(range(size_a - 1, -1, -1))
+            proposals = 0
+        else:
+            partner_a, partner_b, next_choice, free, proposals = state
+
+        while free:
+            proposals += propose_until_done(tables, partner_a, partner_b, next_choice,
+                                            free, limit=every)
+            checkpoint.save(partner_a, partner_b, next_choice, free, proposals, sync)
+
+    return partner_a, proposals
@@ -0,0 +1,556 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Fast matching engines and the kernel registry that picks between them.
+
+The Student/Group classes in gale_shapley.py are written to be easy to read,
+not fast: every proposal looks students up by name and ratings by position.
+The engines here work on an index-based copy of the same preferences
+(PreferenceTables) instead.
+
+Each kernel ("match", "happiness", "stability", "assignment") has a pure-Python
+implementation that always works, and a NumPy implementation that is only
+picked automatically when NumPy is installed and it is actually faster.
+NumPy is never imported until a NumPy kernel is actually requested,
+so `import gale_shapley` stays fast for small classroom-size runs.
+"""
+
+import importlib
+import importlib.util
+import math
+import random
+
+
+# ---------------------------
+# Kernel registry
+# ---------------------------
+
+# Checked once at import time *without* importing NumPy itself
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# kernel name -> backend -> (module name, function name, minimum instance size)
+# The minimum sizes are crossover points measured on fresh instances, so they
+#   include copying the n*n tables into arrays (math.inf: never picked automatically).
+#   That copy alone costs more than the whole pure-Python match or stability check
+#   (e.g. 75 ms against 5 ms and 3 ms for a random instance of 800), at every size
+#   and on worst-case instances too, so those NumPy kernels are only worth forcing
+#   when the arrays are already cached. Happiness only looks at n ratings, so
+#   NumPy has nothing to vectorize. The Hungarian algorithm is O(n^3), which
+#   outgrows the copy at about 150.
+_KERNELS: dict[str, dict[str, tuple[str, str, float]]] = {
+    "match": {
+        "python": ("engines", "gale_shapley_python", 0),
+        "numpy": ("numpy_engines", "gale_shapley_numpy", math.inf),
+    },
+    "happiness": {
+        "python": ("metrics", "happiness_python", 0),
+        "numpy": ("numpy_engines", "happiness_numpy", math.inf),
+    },
+    "stability": {
+        "python": ("metrics", "blocking_pairs_python", 0),
+        "numpy": ("numpy_engines", "blocking_pairs_numpy", math.inf),
+    },
+    "assignment": {
+        "python": ("assignment", "max_welfare_python", 0),
+        "numpy": ("numpy_engines", "max_welfare_numpy", 150),
+    },
+}
+
+# Backends in order of preference when several are big-enough candidates
+_BACKEND_ORDER = ["numpy", "python"]
+
+# How many proposals a match makes between two checks of a ProgressMonitor
+#   (see gale_shapley.py). Checking reads the clock, so not after every proposal.
+MONITOR_CHECK_EVERY = 4096
+
+# (kernel name, backend) -> loaded function
+_loaded = {}
+
+
+def register_kernel(name: str, backend: str, module: str, function: str,
+                    min_size: float = 0):
+    """
+    Register (or replace) an implementation of a kernel.
+
+    The module is not imported until the kernel is first requested.
+
+    Args:
+        name (str): The kernel name, e.g. "match".
+        backend (str): The backend name, e.g. "python" or "numpy".
+        module (str): The module that defines the implementation.
+        function (str): The name of the implementation inside that module.
+        min_size (float): The smallest instance size this backend should be
+            picked for automatically (math.inf for never).
+    """
+    _KERNELS.setdefault(name, {})[backend] = (module, function, min_size)
+    _loaded.pop((name, backend), None)
+    if backend not in _BACKEND_ORDER:
+        _BACKEND_ORDER.insert(0, backend)
+
+
+def available_backends(name: str) -> list[str]:
+    """
+    Returns the backends that can run the named kernel on this machine.
+    """
+    if name not in _KERNELS:
+        raise KeyError(f"Unknown kernel: {name!r}")
+    backends = []
+    for backend in _BACKEND_ORDER:
+        if backend not in _KERNELS[name]:
+            continue
+        if backend == "numpy" and not HAS_NUMPY:
+            continue
+        backends.append(backend)
+    return backends
+
+
+def select_backend(name: str, size: int = 0) -> str:
+    """
+    Returns the backend that get_kernel() would pick for an instance of this size.
+
+    That is the first available backend whose minimum size is at most size.
+    The pure-Python backend has a minimum size of 0, so there is always one.
+    """
+    for backend in available_backends(name):
+        if size >= _KERNELS[name][backend][2]:
+            return backend
+    raise LookupError(f"No backend of {name!r} can run an instance of size {size}")
+
+
+def get_kernel(name: str, size: int = 0, backend: str | None = None):
+    """
+    Returns the implementation of the named kernel.
+
+    Args:
+        name (str): The kernel name, e.g. "match".
+        size (int): The number of students per group, used to pick a backend.
+        backend (str | None): Force a specific backend instead of picking one.
+    """
+    if backend is None:
+        backend = select_backend(name, size)
+    elif backend not in available_backends(name):
+        raise LookupError(f"Backend {backend!r} is not available for {name!r}")
+
+    key = (name, backend)
+    if key not in _loaded:
+        module, function, _ = _KERNELS[name][backend]
+        _loaded[key] = getattr(importlib.import_module(module), function)
+    return _loaded[key]
+
+
+# ---------------------------
+# Index-based preferences
+# ---------------------------
+
+class PreferenceTables:
+    """
+    An index-based copy of both groups' preferences.
+
+    Students are numbered by their position in students_a / students_b.
+    Ratings use the same scale as Student.get_rating_of_name():
+        0 is the least preferred, higher is better, and -1 means "not rated".
+
+    Attributes:
+        names_a (list[str]): The names of the students in group A.
+        names_b (list[str]): The names of the students in group B.
+        prefs_a (list[list[int]]): For each A student, the B students they rated
+            in *proposal order*, i.e. from MOST to LEAST preferred.
+            NOTE: this is the reverse of Student.partner_ratings.
+        prefs_b (list[list[int]]): The same for each B student.
+        ranks_a (list[list[int]]): ranks_a[i][j] is A student i's rating of B student j.
+        ranks_b (list[list[int]]): ranks_b[j][i] is B student j's rating of A student i.
+        cache (dict): Scratch space for backends to keep derived data
+            (e.g. NumPy arrays) so that it is only built once per instance.
+    """
+
+    def __init__(self, prefs_a: list[list[int]], prefs_b: list[list[int]],
+                 names_a: list[str] | None = None,
+                 names_b: list[str] | None = None):
+        """
+        Initialize the tables from proposal-order preference lists.
+
+        Names default to "A0", "A1", ... and "B0", "B1", ...
+        """
+        self.prefs_a = prefs_a
+        self.prefs_b = prefs_b
+        self.names_a = names_a if names_a is not None else [
+            "A" + str(i) for i in range(len(prefs_a))]
+        self.names_b = names_b if names_b is not None else [
+            "B" + str(i) for i in range(len(prefs_b))]
+        self.ranks_a = _ranks_from_prefs(prefs_a, len(prefs_b))
+        self.ranks_b = _ranks_from_prefs(prefs_b, len(prefs_a))
+        self.cache = {}
+
+    def __len__(self) -> int:
+        """
+        Returns the instance size: the number of students in group A.
+        """
+        return len(self.prefs_a)
+
+
+def _ranks_from_prefs(prefs: list[list[int]], other_count: int) -> list[list[int]]:
+    """
+    Turn proposal-order preference lists into rating tables.
+    """
+    ranks = []
+    for pref in prefs:
+        row = [-1] * other_count
+        top = len(pref) - 1
+        for position, other in enumerate(pref):
+            row[other] = top - position
+        ranks.append(row)
+    return ranks
+
+
+def tables_from_ratings(ratings_a: dict[str, list[str]],
+                        ratings_b: dict[str, list[str]]) -> PreferenceTables:
+    """
+    Returns PreferenceTables for two groups given as {name: partner_ratings}.
+
+    The ratings are in the same LEAST to MOST preferred order as
+    Student.partner_ratings. Names that are not in the other group are ignored.
+    """
+    names_a = list(ratings_a)
+    names_b = list(ratings_b)
+    index_a = {name: i for i, name in enumerate(names_a)}
+    index_b = {name: j for j, name in enumerate(names_b)}
+
+    prefs_a = [[index_b[name] for name in reversed(ratings) if name in index_b]
+               for ratings in ratings_a.values()]
+    prefs_b = [[index_a[name] for name in reversed(ratings) if name in index_a]
+               for ratings in ratings_b.values()]
+    return PreferenceTables(prefs_a, prefs_b, names_a, names_b)
+
+
+def tables_from_group(group) -> PreferenceTables:
+    """
+    Returns a PreferenceTables copy of a Group's current preferences.
+    """
+    return tables_from_ratings({s.name: s.partner_ratings for s in group.students_a},
+                               {s.name: s.partner_ratings for s in group.students_b})
+
+
+class Workspace:
+    """
+    Preallocated buffers for running many random matches of the same size.
+
+    Building a Group, copying to_propose lists and calling list comprehensions
+    allocates O(n^2) memory on every run. A Workspace allocates its buffers once;
+    randomize(), match() and happiness() then reuse them in place, so each run
+    of an experiment allocates only O(1) memory.
+
+    A B student's ratings of group A are stored directly: a uniformly random
+    rating row is just a shuffled list of 0..n-1, so no inverse needs building.
+
+    Attributes:
+        size (int): The number of students in each group.
+        prefs_a (list[list[int]]): Each A student's proposal order (MOST preferred first).
+        ranks_b (list[list[int]]): ranks_b[j][i] is B student j's rating of A student i.
+        partner_a (list[int]): Each A student's partner index, or -1.
+        partner_b (list[int]): Each B student's partner index, or -1.
+        next_choice (list[int]): For each A student, how far down prefs_a they
+            have proposed. Once matched, their partner is prefs_a[i][next_choice[i] - 1].
+        proposals (int): The number of proposals made by the last match().
+    """
+
+    def __init__(self, size: int):
+        """
+        Allocate every buffer for matches with size students per group.
+        """
+        self.size = size
+        self.prefs_a = [list(range(size)) for _ in range(size)]
+        self.ranks_b = [list(range(size)) for _ in range(size)]
+        self.partner_a = [-1] * size
+        self.partner_b = [-1] * size
+        self.next_choice = [0] * size
+        self.proposals = 0
+        # A fixed-size stack of free proposers
+        self._free = [0] * size
+        # Rows are reset from this before shuffling, reusing its int objects
+        self._identity = list(range(size))
+
+    def randomize(self, rng: random.Random | None = None):
+        """
+        Shuffle everyone's preferences in place.
+
+        Every row is put back in order first, so the result only depends on rng
+            and not on the previous run (which keeps seeded runs reproducible).
+        Uses the global random module unless an rng is given.
+        """
+        shuffle = rng.shuffle if rng is not None else random.shuffle
+        identity = self._identity
+        for rows in (self.prefs_a, self.ranks_b):
+            for row in rows:
+                for k, value in enumerate(identity):
+                    row[k] = value
+                shuffle(row)
+
+    def load(self, tables: PreferenceTables):
+        """
+        Copy an instance's preferences into the buffers, in place.
+
+        Everyone must rate everyone, with size students in each group.
+        """
+        for row, pref in zip(self.prefs_a, tables.prefs_a):
+            row[:] = pref
+        for row, ranks in zip(self.ranks_b, tables.ranks_b):
+            row[:] = ranks
+
+    def reset(self):
+        """
+        Remove all partnerships, without reallocating anything.
+        """
+        partner_a = self.partner_a
+        partner_b = self.partner_b
+        next_choice = self.next_choice
+        for i in range(self.size):
+            partner_a[i] = -1
+            partner_b[i] = -1
+            next_choice[i] = 0
+        self.proposals = 0
+
+    def match(self, trace=None, monitor=None) -> int:
+        """
+        Make Gale-Shapley partnerships in place, with group A proposing.
+
+        If a ProposalTrace is given, every event is recorded in it (see proposal_trace.py).
+        If a ProgressMonitor is given, it is checked every MONITOR_CHECK_EVERY
+            proposals, so that it can cancel a long match.
+        Returns the number of proposals made.
+        """
+        self.reset()
+        prefs_a = self.prefs_a
+        ranks_b = self.ranks_b
+        partner_a = self.partner_a
+        partner_b = self.partner_b
+        next_choice = self.next_choice
+        free = self._free
+
+        # Push A0 last so that it proposes first, like gale_shapley_python()
+        size = self.size
+        for i in range(size):
+            free[i] = size - 1 - i
+        free_count = size
+        proposals = 0
+        record = trace.record if trace is not None else None
+        check_at = MONITOR_CHECK_EVERY if monitor is not None else math.inf
+
+        while free_count:
+            if proposals >= check_at:
+                monitor.check(proposals=proposals, free=free_count)
+                check_at = proposals + MONITOR_CHECK_EVERY
+            free_count -= 1
+            a = free[free_count]
+            prefs = prefs_a[a]
+            k = next_choice[a]
+            while k < size:
+                b = prefs[k]
+                k += 1
+                proposals += 1
+                rank_b = ranks_b[b]
+                current = partner_b[b]
+                if current < 0 or rank_b[a] > rank_b[current]:
+                    if current >= 0:
+                        partner_a[current] = -1
+                        free[free_count] = current
+                        free_count += 1
+                        if record:
+                            record(trace.BREAKUP, current, b)
+                    if record:
+                        record(trace.ACCEPT, a, b)
+                    partner_b[b] = a
+                    partner_a[a] = b
+                    break
+                if record:
+                    record(trace.REJECT, a, b)
+            next_choice[a] = k
+
+        self.proposals = proposals
+        return proposals
+
+    def match_naive(self):
+        """
+        Pair A student i with B student i, like Group.make_naive_partnerships().
+        """
+        self.reset()
+        for i in range(self.size):
+            self.partner_a[i] = i
+            self.partner_b[i] = i
+            self.next_choice[i] = self.prefs_a[i].index(i) + 1
+
+    def match_max_welfare(self):
+        """
+        Make the partnerships with the highest total rating (see assignment.py).
+
+        Unlike match() and match_naive(), this allocates O(n^2) memory.
+        """
+        partner_a = get_kernel("assignment", self.size)(self.to_tables())
+        self.reset()
+        for i, j in enumerate(partner_a):
+            self.partner_a[i] = j
+            self.partner_b[j] = i
+            self.next_choice[i] = self.prefs_a[i].index(j) + 1
+
+    def happiness(self) -> tuple[float, float, float]:
+        """
+        Returns the average (A, B, all) happiness of the current partnerships.
+
+        Uses the same formula as calculate_average_happiness() in gale_shapley.py.
+        """
+        size = self.size
+        total_a = 0
+        total_b = 0
+        for i in range(size):
+            if self.partner_a[i] >= 0:
+                # The partner sits next_choice[i] - 1 places down the proposal order
+                total_a += size - self.next_choice[i]
+            else:
+                total_a -= 1
+            j = self.partner_b[i]
+            total_b += self.ranks_b[i][j] if j >= 0 else -1
+
+        options = size - 1
+        return (total_a / (size * options),
+                total_b / (size * options),
+                (total_a + total_b) / (2 * size * options))
+
+    def to_tables(self) -> PreferenceTables:
+        """
+        Returns a PreferenceTables copy of the current preferences.
+
+        This allocates, so it is meant for checking results, not for every run.
+        """
+        prefs_b = []
+        for row in self.ranks_b:
+            pref = [0] * self.size
+            for i, rank in enumerate(row):
+                pref[self.size - 1 - rank] = i
+            prefs_b.append(pref)
+        return PreferenceTables([row[:] for row in self.prefs_a], prefs_b)
+
+
+def apply_partners(group, partner_a: list[int]):
+    """
+    Make the partnerships described by partner_a on a Group.
+
+    partner_a[i] is the index of A student i's partner in group B, or -1.
+    """
+    group.break_all_partnerships()
+    for i, j in enumerate(partner_a):
+        if j >= 0:
+            group.students_a[i].make_partnership(group.students_b[j])
+
+
+def match_group(group, backend: str | None = None) -> int:
+    """
+    Make Gale-Shapley partnerships on a Group using the fastest available engine.
+
+    Gives the same partnerships as Group.make_gale_shapely_partnerships() when
+    everyone rates everyone. With incomplete lists the two can differ, because a
+    Group's B students accept anyone while they have no partner, even students
+    they did not rate, but the kernels never do.
+    Returns the number of proposals that were made.
+    """
+    tables = tables_from_group(group)
+    partner_a, proposals = get_kernel("match", len(tables), backend)(tables)
+    apply_partners(group, partner_a)
+    return proposals
+
+
+# ---------------------------
+# Pure-Python kernels
+# ---------------------------
+
+def gale_shapley_python(tables: PreferenceTables, trace=None, monitor=None) -> tuple[list[int], int]:
+    """
+    Run deferred acceptance with group A proposing.
+
+    A B student accepts a proposal if they rated the proposer and
+    prefer them to their current partner (if any).
+    Proposers that run out of choices stay unpartnered.
+    If a ProposalTrace is given, every event is recorded in it (see proposal_trace.py).
+    If a ProgressMonitor is given, it can cancel the match (see propose_until_done).
+
+    Returns:
+        (partner_a, proposals): partner_a[i] is the B index A student i is
+            matched with (or -1), and proposals is how many proposals were made.
+    """
+    partner_a = [-1] * len(tables.prefs_a)
+    partner_b = [-1] * len(tables.ranks_b)
+    next_choice = [0] * len(tables.prefs_a)
+    # A stack of free proposers; reversed so that A0 proposes first
+    free = list(range(len(tables.prefs_a) - 1, -1, -1))
+    proposals = propose_until_done(tables, partner_a, partner_b, next_choice, free, trace,
+                                   monitor=monitor)
+    return partner_a, proposals
+
+
+def propose_until_done(tables: PreferenceTables, partner_a: list[int],
+                       partner_b: list[int], next_choice: list[int],
+                       free: list[int], trace=None, limit: int | None = None,
+                       monitor=None) -> int:
+    """
+    Carry on deferred acceptance from a partly-run state until nobody is free.
+
+    Updates every list in place. Other engines use this to finish off
+    a run that they started another way.
+
+    With a limit, stops early once at least that many proposals have been made.
+    It only stops between proposers, so the lists are always left as a state
+    that can be carried on from later with exactly the same result.
+
+    Args:
+        tables (PreferenceTables): The preferences.
+        partner_a (list[int]): Each A student's partner index, or -1.
+        partner_b (list[int]): Each B student's partner index, or -1.
+        next_choice (list[int]): For each A student, the position in their
+            prefs_a list of the next B student they will propose to.
+        free (list[int]): A stack of unpartnered A students still to propose.
+        trace (ProposalTrace | None): Where to record every event, if anywhere.
+        limit (int | None): Roughly how many proposals to make before stopping.
+        monitor (ProgressMonitor | None): Checked every MONITOR_CHECK_EVERY proposals.
+            If it raises MatchCancelled, that happens between proposers too,
+            so the lists can still be carried on from.
+
+    Returns:
+        int: The number of proposals made.
+    """
+    prefs_a = tables.prefs_a
+    ranks_b = tables.ranks_b
+    proposals = 0
+    record = trace.record if trace is not None else None
+    if limit is None:
+        limit = math.inf
+    check_at = MONITOR_CHECK_EVERY if monitor is not None else math.inf
+
+    while free and proposals < limit:
+        if proposals >= check_at:
+            monitor.check(proposals=proposals, free=len(free))
+            check_at = proposals + MONITOR_CHECK_EVERY
+        a = free.pop()
+        prefs = prefs_a[a]
+        k = next_choice[a]
+        while k < len(prefs):
+            b = prefs[k]
+            k += 1
+            proposals += 1
+            rank_b = ranks_b[b]
+            current = partner_b[b]
+            current_rank = rank_b[current] if current >= 0 else -1
+            if rank_b[a] > current_rank:
+                if current >= 0:
+                    partner_a[current] = -1
+                    free.append(current)
+                    if record:
+                        record(trace.BREAKUP, current, b)
+                if record:
+                    record(trace.ACCEPT, a, b)
+                partner_b[b] = a
+                partner_a[a] = b
+                break
+            if record:
+                record(trace.REJECT, a, b)
+        next_choice[a] = k
+
+    return proposals
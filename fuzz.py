@@ -0,0 +1,302 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Differential fuzzing: run every matching engine on the same instances and compare.
+
+There are now many ways to run Gale-Shapley (Group, Workspace, the kernels,
+sharded, checkpointed, traced). The NumPy kernel only vectorizes rounds with
+at least numpy_engines.SEQUENTIAL_TAIL free proposers, so it is also run with
+every round vectorized. Its default path needs "large" instances, which are
+over 10 times slower to check, so they are opt-in (large_every=).
+Each instance here is run through every
+engine that can handle it, and the results are checked:
+    - every engine finds the same partnerships and makes the same number of
+      proposals (deferred acceptance makes the same proposals in any order);
+    - the partnerships are a valid, stable matching;
+    - no A student does worse than in the B-optimal stable matching;
+    - the number of proposals is within its known bounds
+      (exactly n^2 - n + 1 for instances.worst_case_instance()).
+
+Instances cycle through several families, from uniformly random to
+worst-case, with the students relabelled at random so that no engine can
+get lucky with index order. Instance i is generated from derive_seed(seed, i),
+so any failure can be reproduced with fuzz_instance(seed, i).
+
+Usage:
+    python fuzz.py --count 10000 --seed 1
+    python fuzz.py --count 1000 --large-every 10
+"""
+
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+
+import engines
+import instances
+from gale_shapley import Group, derive_seed
+from metrics import blocking_pairs_python
+
+# The kinds of instance fuzz() generates, in turn
+FAMILIES = ("random", "incomplete", "unbalanced", "identical_lists", "worst_case")
+
+# The sizes of "large" instances: bigger than numpy_engines.SEQUENTIAL_TAIL (64),
+#   so that the NumPy kernel's default settings run some vectorized rounds
+LARGE_SIZES = (65, 96)
+
+
+def fuzz_instance(seed: int, index: int, max_size: int = 8,
+                  large_every: int = 0) -> tuple[str, engines.PreferenceTables]:
+    """
+    Returns the (family, tables) of instance number index in a fuzz run with that seed.
+
+    With large_every, every large_every-th instance is a "large" one
+        (with LARGE_SIZES students, complete or incomplete lists) instead.
+    """
+    rng = random.Random(derive_seed(seed, index))
+    if large_every and (index + 1) % large_every == 0:
+        family = "large"
+    else:
+        family = FAMILIES[index % len(FAMILIES)]
+    size = rng.randint(1, max_size)
+
+    if family == "random":
+        tables = instances.random_instance(size, rng)
+    elif family == "incomplete":
+        tables = instances.random_instance(size, rng, keep=rng.random())
+    elif family == "unbalanced":
+        size_b = rng.randint(0, max_size)
+        prefs_a = [rng.sample(range(size_b), rng.randint(0, size_b)) for _ in range(size)]
+        prefs_b = [rng.sample(range(size), rng.randint(0, size)) for _ in range(size_b)]
+        tables = engines.PreferenceTables(prefs_a, prefs_b)
+    elif family == "identical_lists":
+        tables = instances.identical_lists_instance(size)
+    elif family == "worst_case":
+        tables = instances.worst_case_instance(size)
+    else:
+        # Complete or incomplete lists, half the time each
+        keep = 1.0 if rng.random() < 0.5 else rng.uniform(0.2, 1.0)
+        tables = instances.random_instance(rng.randint(*LARGE_SIZES), rng, keep)
+    return family, instances.relabel(tables, rng)
+
+
+def is_complete(tables: engines.PreferenceTables) -> bool:
+    """
+    Returns True if both groups are the same size and everyone rates everyone.
+
+    Group and Workspace assume this:
+        - A Workspace has a fixed size, and no way to store shorter lists.
+        - A Group's B students accept a proposal whenever they have no partner,
+          even from an A student they did not rate, so with incomplete lists
+          it can give a different matching (and a different proposal count)
+          from deferred acceptance as the other engines run it.
+    """
+    size = len(tables.prefs_a)
+    return (len(tables.prefs_b) == size
+            and all(len(pref) == size for pref in tables.prefs_a)
+            and all(len(pref) == size for pref in tables.prefs_b))
+
+
+# ---------------------------
+# Engines
+# Each takes PreferenceTables and returns (partner_a, proposals)
+# ---------------------------
+
+def _run_group(tables: engines.PreferenceTables) -> tuple[list[int], int]:
+    group = Group(tables.names_a, tables.names_b)
+    instances.set_group_ratings(group, tables)
+    group.make_gale_shapely_partnerships()
+    index_b = {id(b): j for j, b in enumerate(group.students_b)}
+    return [index_b[id(a.partner)] if a.partner else -1 for a in group.students_a], \
+        group.proposal_count
+
+
+def _run_workspace(tables: engines.PreferenceTables) -> tuple[list[int], int]:
+    workspace = engines.Workspace(len(tables.prefs_a))
+    workspace.load(tables)
+    proposals = workspace.match()
+    return workspace.partner_a[:], proposals
+
+
+def _run_sharded(tables: engines.PreferenceTables) -> tuple[list[int], int]:
+    import sharded
+
+    with sharded.InProcessTransport(3) as transport:
+        return sharded.sharded_gale_shapley(tables, transport)
+
+
+def _run_checkpointed(tables: engines.PreferenceTables) -> tuple[list[int], int]:
+    import checkpoint
+
+    handle, path = tempfile.mkstemp(suffix=".ckpt")
+    os.close(handle)
+    try:
+        # Checkpoint after every few proposals, so that saving gets exercised too.
+        # Nothing needs to survive a crash here, so don't wait for the disk.
+        return checkpoint.gale_shapley_checkpointed(tables, path, every=3, sync=False)
+    finally:
+        os.remove(path)
+
+
+def _run_traced(tables: engines.PreferenceTables) -> tuple[list[int], int]:
+    import proposal_trace
+
+    trace = proposal_trace.trace_for_tables(tables)
+    engines.gale_shapley_python(tables, trace)
+    partner_a, _ = trace.state_at()
+    return partner_a, trace.proposal_count()
+
+
+def _kernel_engine(backend: str):
+    def run(tables: engines.PreferenceTables) -> tuple[list[int], int]:
+        return engines.get_kernel("match", backend=backend)(tables)
+    return run
+
+
+def _run_numpy_vectorized(tables: engines.PreferenceTables) -> tuple[list[int], int]:
+    import numpy_engines
+
+    # Every round vectorized, however few proposers are free
+    #   (by default the NumPy kernel leaves small instances to the Python loop)
+    return numpy_engines.gale_shapley_numpy(tables, sequential_tail=1)
+
+
+def available_engines() -> dict[str, tuple[object, bool]]:
+    """
+    Returns {engine name: (function, needs complete lists)} for every engine that can run here.
+    """
+    backends = engines.available_backends("match")
+    result = {f"kernel:{backend}": (_kernel_engine(backend), False) for backend in backends}
+    if "numpy" in backends:
+        result["numpy:vectorized"] = (_run_numpy_vectorized, False)
+    result.update({
+        "group": (_run_group, True),
+        "workspace": (_run_workspace, True),
+        "sharded": (_run_sharded, False),
+        "checkpointed": (_run_checkpointed, False),
+        "traced": (_run_traced, False),
+    })
+    return result
+
+
+# ---------------------------
+# Checks
+# ---------------------------
+
+def check_instance(family: str, tables: engines.PreferenceTables,
+                   engine_names: list[str] | None = None) -> list[str]:
+    """
+    Run every engine on one instance and check the results.
+
+    Returns:
+        list[str]: A description of each problem found (empty if everything agrees).
+    """
+    all_engines = available_engines()
+    if engine_names is None:
+        engine_names = list(all_engines)
+    complete = is_complete(tables)
+
+    # The pure-Python kernel is always run, as the reference
+    partner_a, proposals = engines.gale_shapley_python(tables)
+    problems = []
+    for name in engine_names:
+        fxn, needs_complete = all_engines[name]
+        if needs_complete and not complete:
+            continue
+        result = fxn(tables)
+        if result != (partner_a, proposals):
+            problems.append(f"{name} gave {result}, but the reference gave {(partner_a, proposals)}")
+
+    # A valid matching of students who rated each other
+    matched = [j for j in partner_a if j >= 0]
+    if len(matched) != len(set(matched)):
+        problems.append(f"{partner_a} gives some B student two partners")
+    for i, j in enumerate(partner_a):
+        if j >= 0 and (tables.ranks_a[i][j] < 0 or tables.ranks_b[j][i] < 0):
+            problems.append(f"A{i} and B{j} are partnered without rating each other")
+
+    blocking = blocking_pairs_python(tables, partner_a)
+    if blocking:
+        problems.append(f"{partner_a} is unstable: blocking pairs {blocking}")
+
+    # The A-optimal matching is at least as good for group A as the B-optimal one
+    partner_b_optimal, _ = engines.gale_shapley_python(
+        engines.PreferenceTables(tables.prefs_b, tables.prefs_a))
+    partner_a_of_b_optimal = [-1] * len(partner_a)
+    for j, i in enumerate(partner_b_optimal):
+        if i >= 0:
+            partner_a_of_b_optimal[i] = j
+    for i, j in enumerate(partner_a):
+        rating = tables.ranks_a[i][j] if j >= 0 else -1
+        other = partner_a_of_b_optimal[i]
+        if other >= 0 and tables.ranks_a[i][other] > rating:
+            problems.append(f"A{i} does better in the B-optimal matching, so {partner_a} is not A-optimal")
+
+    # Every partnership took at least one proposal, and nobody proposes twice
+    most = sum(len(pref) for pref in tables.prefs_a)
+    if not len(matched) <= proposals <= most:
+        problems.append(f"{proposals} proposals is outside [{len(matched)}, {most}]")
+    n = len(tables.prefs_a)
+    if complete and n and proposals > n * n - n + 1:
+        problems.append(f"{proposals} proposals is more than n^2 - n + 1 = {n * n - n + 1}")
+    if family == "worst_case" and proposals != n * n - n + 1:
+        problems.append(f"Expected the worst case, {n * n - n + 1} proposals, got {proposals}")
+    if family == "identical_lists" and proposals != n * (n + 1) // 2:
+        problems.append(f"Expected {n * (n + 1) // 2} proposals, got {proposals}")
+
+    return problems
+
+
+def fuzz(count: int = 1000, seed: int = 0, max_size: int = 8,
+         engine_names: list[str] | None = None,
+         large_every: int = 0) -> dict[str, int | float | list[str]]:
+    """
+    Check count instances with up to max_size students per group.
+
+    With large_every, every large_every-th instance is a large one instead
+        (see fuzz_instance()). They are much slower to check, so this is off by default.
+
+    Returns:
+        dict: the number of "instances" checked, the "failures" (each naming the
+            instance so that fuzz_instance() can reproduce it), and "per_second".
+    """
+    failures = []
+    start = time.perf_counter()
+    for index in range(count):
+        family, tables = fuzz_instance(seed, index, max_size, large_every)
+        for problem in check_instance(family, tables, engine_names):
+            failures.append(f"instance {index} ({family}, seed {seed}): {problem}")
+    elapsed = time.perf_counter() - start
+    return {
+        "instances": count,
+        "failures": failures,
+        "per_second": count / elapsed if elapsed else math.inf,
+    }
+
+
+def main(argv: list[str] | None = None):
+    """
+    Run the fuzzer from the command line and print any failures.
+    """
+    parser = argparse.ArgumentParser(description="Check that every matching engine agrees.")
+    parser.add_argument("--count", type=int, default=1000, help="how many instances to check")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-size", type=int, default=8,
+                        help="the largest number of students per group")
+    parser.add_argument("--large-every", type=int, default=0,
+                        help="make every Nth instance a large one, to reach NumPy's vectorized rounds")
+    args = parser.parse_args(argv)
+
+    result = fuzz(args.count, args.seed, args.max_size, large_every=args.large_every)
+    for failure in result["failures"]:
+        print(failure)
+    print(f"{result['instances']} instances, {len(result['failures'])} failures, "
+          f"{result['per_second']:.0f} instances per second "
+          f"(engines: {', '.join(available_engines())})")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,10 +11,150 @@ makes pairings of A and B members, so that no two people would both
 be happier if they switched partners with each other.
 """
 
+import importlib
 import math
 import random
 import time
 
+# Heavier parts of the project live in their own modules and are only imported
+# the first time they are used (e.g. gale_shapley.engines), so that
+# `import gale_shapley` stays fast for the many tiny matches our scripts run.
+# Attribute name -> module name
+_LAZY_SUBMODULES = {
+    "engines": "engines",
+    "metrics": "metrics",
+    "io": "matching_io",
+    "benchmark": "benchmark",
+    "lazy_random": "lazy_random",
+    "trace": "proposal_trace",
+    "checkpoint": "checkpoint",
+    "sharded": "sharded",
+    "manipulation": "manipulation",
+}
+
+
+def __getattr__(name: str):
+    """
+    Import a lazily loaded submodule the first time it is accessed.
+    """
+    if name in _LAZY_SUBMODULES:
+        module = importlib.import_module(_LAZY_SUBMODULES[name])
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_LAZY_SUBMODULES))
+
+
+class MatchCancelled(Exception):
+    """
+    Raised when a match or experiment stops early, because it was cancelled
+    or ran over its time budget (see ProgressMonitor).
+
+    Attributes:
+        progress (dict): The last progress measured before stopping.
+    """
+
+    def __init__(self, message: str, progress: dict[str, int | float]):
+        super().__init__(message)
+        self.progress = progress
+
+    def __reduce__(self):
+        # So that it survives being sent back from a worker process
+        return MatchCancelled, (str(self), self.progress)
+
+
+class ProgressMonitor:
+    """
+    Watches a long match or experiment: reports its progress, and stops it when asked.
+
+    Pass one as monitor= to Group.make_gale_shapely_partnerships() or run_experiment()
+    (or to Workspace.match() and the other engines). They call check() after
+    every round or run, or every engines.MONITOR_CHECK_EVERY proposals, which:
+        - raises MatchCancelled if cancel is set or the time budget has run out;
+        - calls callback with a progress dict, at most once every interval seconds.
+    When the work finishes, callback is called once more with the final progress.
+    check() is never called once the work is done, so a finished result is never thrown away.
+
+    Progress dicts always have "elapsed" (seconds). A match adds "proposals"
+    and "free" (unpartnered proposers left), and a Group match adds "round";
+    an experiment adds "runs_done" and "run_count". An experiment passes its
+    monitor on to each run's match, so those checks have both, and the time
+    budget covers the whole experiment.
+
+    Attributes:
+        callback (callable | None): Called with each progress dict.
+        interval (float): The least time between two callbacks, in seconds.
+        cancel (threading.Event | None): Anything with an is_set() method.
+            Setting it (e.g. from another thread) stops the work at the next check.
+            It is looked at no more than once every CANCEL_POLL_INTERVAL seconds,
+            since asking some events (like a multiprocessing.Manager's) is slow.
+        time_budget (float | None): Stop the work after this many seconds.
+    """
+
+    CANCEL_POLL_INTERVAL = 0.01
+
+    def __init__(self, callback=None, interval: float = 1.0, cancel=None,
+                 time_budget: float | None = None):
+        self.callback = callback
+        self.interval = interval
+        self.cancel = cancel
+        self.time_budget = time_budget
+        self.progress = {}
+        self._start = time.perf_counter()
+        self._last_report = self._start
+        self._next_poll = -math.inf
+        # How many pieces of work (e.g. an experiment, then a match in it) are running
+        self._depth = 0
+
+    def begin(self):
+        """
+        Start timing (the time budget and report interval count from here).
+
+        If work is already running (a match inside an experiment), the timing carries on.
+        """
+        if self._depth == 0:
+            self.progress = {}
+            self._start = time.perf_counter()
+            self._last_report = self._start
+            self._next_poll = -math.inf
+        self._depth += 1
+
+    def check(self, **progress):
+        """
+        Report progress if it is time to, and raise MatchCancelled if the work should stop.
+        """
+        now = time.perf_counter()
+        self.progress.update(progress)
+        self.progress["elapsed"] = now - self._start
+        if self.cancel is not None and now >= self._next_poll:
+            self._next_poll = now + self.CANCEL_POLL_INTERVAL
+            if self.cancel.is_set():
+                self._stop("Cancelled")
+        if self.time_budget is not None and self.progress["elapsed"] > self.time_budget:
+            self._stop(f"Ran over the time budget of {self.time_budget} seconds")
+        if self.callback is not None and now - self._last_report >= self.interval:
+            self._last_report = now
+            self.callback(dict(self.progress))
+
+    def _stop(self, message: str):
+        # Everything running stops, so the next begin() starts afresh
+        self._depth = 0
+        raise MatchCancelled(message, dict(self.progress))
+
+    def finish(self, **progress):
+        """
+        Report the final progress, once the outermost piece of work is done.
+        """
+        self._depth = max(self._depth - 1, 0)
+        self.progress.update(progress)
+        if self._depth == 0:
+            self.progress["elapsed"] = time.perf_counter() - self._start
+            if self.callback is not None:
+                self.callback(dict(self.progress))
+
 
 class Student:
     """
@@ -38,13 +178,21 @@ class Student:
             NOTE: The contents are added in create_gale_shapely_partnerships().
     """
 
-    def randomize_ratings(self):
+    def randomize_ratings(self, rng: random.Random | None = None):
         """
         Randomize this student's preferences
 
         Useful for testing and running random experiments
+
+        If rng is given, the ratings are sorted before being shuffled with it,
+            so the result only depends on rng and not on the previous ratings.
+        Otherwise the global random module is used.
         """
-        random.shuffle(self.partner_ratings)
+        if rng is None:
+            random.shuffle(self.partner_ratings)
+        else:
+            self.partner_ratings.sort()
+            rng.shuffle(self.partner_ratings)
 
     # Part 1: Setup
     # ---------------------------------------------
@@ -61,6 +209,9 @@ class Student:
         self.partner_ratings = partner_ratings[:]
         self.partner = None
         self.to_propose = []
+        # {name: rating}, only set while make_gale_shapely_partnerships() runs
+        #   so that get_rating_of_name() does not have to search partner_ratings
+        self._rating_lookup = None
 
     def __str__(self) -> str:
         """
@@ -94,6 +245,8 @@ class Student:
             the second-least preferred student is rated 1
             etc
         """
+        if self._rating_lookup is not None:
+            return self._rating_lookup.get(name, -1)
         if name in self.partner_ratings:
             return self.partner_ratings.index(name)
         else:
@@ -106,10 +259,7 @@ class Student:
             or if this Student does not have a partner, returns -1
         """
         if self.partner != None:
-            if self.partner.name in self.partner_ratings:
-                return self.partner_ratings.index(self.partner.name)
-            else:
-                return -1
+            return self.get_rating_of_name(self.partner.name)
         else:
             return -1
 
@@ -143,7 +293,7 @@ class Student:
     # Part 3: Algorithm
     # ---------------------------------------------
 
-    def propose_to_top_choice(self):
+    def propose_to_top_choice(self, trace: 'None | proposal_trace.ProposalTrace' = None):
         """
         Propose a partnership to our top choice.
 
@@ -159,15 +309,31 @@ class Student:
             (3) If we are preferred less than their current partner or if no student is found,
                 then nothing happens, but they are now removed (with .pop()) from
                 our list of potential partners so that we can't propose to them again.
+
+        If a trace is given, the outcome is recorded in it (see proposal_trace.py).
+
+        Returns the student this proposal leaves without a partner:
+            us in case (3), their old partner in case (2), and None otherwise.
         """
         if self.to_propose:
             propose_str = self.to_propose.pop()
             propose_student = self.group.get_student_by_name(propose_str)
             if not propose_student.has_partner():
                 self.make_partnership(propose_student)
+                if trace is not None:
+                    trace.record_students(trace.ACCEPT, self, propose_student)
             else:
                 if propose_student.get_rating_of_name(self.name) > propose_student.get_rating_of_current_partner():
+                    former = propose_student.partner
+                    if trace is not None:
+                        trace.record_students(trace.BREAKUP, former, propose_student)
+                        trace.record_students(trace.ACCEPT, self, propose_student)
                     self.make_partnership(propose_student)
+                    return former
+                if trace is not None:
+                    trace.record_students(trace.REJECT, self, propose_student)
+                return self
+        return None
 
 
 class Group:
@@ -180,6 +346,8 @@ class Group:
         students_a (list[Student]): The students in group A.
         students_b (list[Student]) The students in group B.
         all_students (list[Student]): The students in both groups.
+        proposal_count (int): How many proposals the last call to
+            make_gale_shapely_partnerships() made.
     """
 
     def __init__(self, names_a: list[str], names_b: list[str]):
@@ -207,12 +375,24 @@ class Group:
             self.students_b.append(Student(self, name, ratings))
 
         self.all_students : list[Student] = self.students_a + self.students_b
+        self.proposal_count = 0
+
+        # Looking students up by name happens on every proposal,
+        #   so keep a dictionary instead of searching all_students each time
+        self._students_by_name : dict[str, Student] = {}
+        for s in self.all_students:
+            self._students_by_name.setdefault(s.name, s)
 
     def get_student_by_name(self, name: str) -> 'None | Student':
         """
         Return the student with that name,
           or None if that student is not found
         """
+        s = self._students_by_name.get(name)
+        if s is not None and s.name == name:
+            return s
+
+        # Fall back to searching, in case students were added or renamed
         found = [s for s in self.all_students if s.name == name]
 
         if found:
@@ -230,14 +410,15 @@ class Group:
             s = self.get_student_by_name(name)
             s.partner_ratings = partner_ratings
 
-    def randomize_ratings(self):
+    def randomize_ratings(self, rng: random.Random | None = None):
         """
         Randomize each student's preferences.
 
         Used for running experiments.
+        Pass an rng (e.g. random.Random(seed)) to make the result reproducible.
         """
         for s in self.all_students:
-            s.randomize_ratings()
+            s.randomize_ratings(rng)
 
     def break_all_partnerships(self):
         """
@@ -246,11 +427,17 @@ class Group:
         for s in self.all_students:
             s.break_partnership()
 
-    def make_gale_shapely_partnerships(self):
+    def make_gale_shapely_partnerships(self, trace: 'None | proposal_trace.ProposalTrace' = None,
+                                       monitor: ProgressMonitor | None = None):
         """
         Make partnerships with the Gale Shapley algorithm.
 
         This should result in better partnerships than the naive approach.
+        Pass a ProposalTrace (e.g. proposal_trace.trace_for_group(group))
+            to record every proposal, acceptance and breakup.
+        Pass a ProgressMonitor to hear about progress after each round, and to
+            be able to cancel the match. If it is cancelled, MatchCancelled is
+            raised and the partnerships are left as they were at that point.
 
         Some visual animations of how it works:
         https://www.youtube.com/watch?v=fudb8DuzQlM
@@ -282,10 +469,44 @@ class Group:
         for s in self.students_a:
             s.to_propose = s.partner_ratings[:]
 
-        while self.get_unpartnered():
+        # Group B is asked for ratings on every proposal. Searching a list for
+        #   a name takes O(n) time, which would make the algorithm O(n^3),
+        #   so give each B student a dictionary to look ratings up in instead.
+        # Nobody's ratings change while the algorithm runs, so this is safe
+        #   until we throw the dictionaries away at the end.
+        for s in self.students_b:
+            s._rating_lookup = {}
+            for rating, name in enumerate(s.partner_ratings):
+                s._rating_lookup.setdefault(name, rating)
+
+        self.proposal_count = 0
+        rounds = 0
+        if monitor is not None:
+            monitor.begin()
+        try:
             proposers = self.get_unpartnered()
-            for s in proposers:
-                s.propose_to_top_choice()
+            while proposers:
+                # Only the students a proposal leaves single can be free next round,
+                #   so collect them rather than searching all of group A again.
+                #   (Some rounds have only one proposer, and there can be ~n^2 of them.)
+                left_single = []
+                for s in proposers:
+                    # Someone with nobody left to propose to makes no proposal
+                    if s.to_propose:
+                        self.proposal_count += 1
+                    single = s.propose_to_top_choice(trace)
+                    if single is not None:
+                        left_single.append(single)
+                rounds += 1
+                # Someone left single may have been accepted again later in the round
+                proposers = [s for s in dict.fromkeys(left_single) if not s.has_partner()]
+                if monitor is not None and proposers:
+                    monitor.check(round=rounds, free=len(proposers), proposals=self.proposal_count)
+        finally:
+            for s in self.students_b:
+                s._rating_lookup = None
+        if monitor is not None:
+            monitor.finish(round=rounds, free=0, proposals=self.proposal_count)
 
     # -------------------------------
     # Useful data-printing methods
@@ -360,6 +581,24 @@ class Group:
         for i, student_a in enumerate(self.students_a):
             student_a.make_partnership(self.students_b[i])
 
+    def make_max_welfare_partnerships(self):
+        """
+        Makes the partnerships with the highest total happiness.
+
+        That is, the total of every student's rating of their partner
+          (in both groups) is as high as it can possibly be.
+        This is the best welfare any matching can get, so comparing it with
+          make_gale_shapely_partnerships() shows what stability costs.
+        Unlike Gale-Shapley, the result is usually *not* stable.
+
+        Uses the Hungarian algorithm (see assignment.py), which takes O(n^3) time.
+        """
+        # Imported here so that `import gale_shapley` stays fast
+        from engines import apply_partners, get_kernel, tables_from_group
+
+        tables = tables_from_group(self)
+        apply_partners(self, get_kernel("assignment", len(tables))(tables))
+
 
 # ---------------------------
 # Experiment-running functions
@@ -380,9 +619,199 @@ def calculate_average_happiness(students: list[Student]) -> int:
     return total / (student_count * option_count)
 
 
+def derive_seed(seed: int, run_index: int) -> int:
+    """
+    Returns the seed for one run of a seeded experiment.
+
+    Every run gets its own random stream, made by hashing the experiment's seed
+    together with the run's index (the same idea as NumPy's SeedSequence.spawn,
+    without needing NumPy). A run therefore never depends on the runs before it,
+    so it can be recomputed on its own or in another process.
+    """
+    # Imported here because only seeded experiments need it, and it is slow to import
+    import hashlib
+
+    digest = hashlib.blake2b(f"{seed}:{run_index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def make_experiment_group(student_count: int) -> Group:
+    """
+    Returns a Group of student_count pairs of Students named "A0", "B0", "A1", ...
+    """
+    # We need unique names, but because this is an experiement,
+    #   we don't need them to be memorable
+    # Create names ["A0", "A1", ..] etc
+    names_a = ["A" + str(i) for i in range(0, student_count)]
+    names_b = ["B" + str(i) for i in range(0, student_count)]
+    return Group(names_a, names_b)
+
+
+# The ways run_experiment can carry out its runs (see run_experiment)
+EXPERIMENT_ENGINES = ("group", "workspace", "lazy")
+
+# The preferences run_experiment can use: random, or one of instances.HARD_INSTANCES
+EXPERIMENT_PREFERENCES = ("random", "identical_lists", "worst_case")
+
+
+def run_seeded(student_count: int, matchmaking_fxn: str, seed: int,
+               run_indices: list[int], engine: str = "group",
+               monitor: ProgressMonitor | None = None,
+               preferences: str = "random") \
+        -> list[tuple[float, float, float]]:
+    """
+    Returns the (A, B, all) happiness of the given runs of a seeded experiment.
+
+    Run i always randomizes the ratings with random.Random(derive_seed(seed, i)),
+    so it gives the same result whichever other runs happen in the same call.
+
+    engine and preferences are as for run_experiment.
+    If a monitor is given, it is checked after every run (see ProgressMonitor).
+    """
+    if engine == "workspace":
+        return _run_seeded_workspace(student_count, matchmaking_fxn, seed, run_indices, monitor,
+                                     preferences)
+    if engine == "lazy":
+        if preferences != "random":
+            raise ValueError(f"Lazy preferences are always random, not {preferences!r}")
+        return _run_seeded_lazy(student_count, matchmaking_fxn, seed, run_indices, monitor)
+
+    g = make_experiment_group(student_count)
+    fxn = _monitored(getattr(g, matchmaking_fxn), matchmaking_fxn, monitor)
+
+    results = []
+    for i in run_indices:
+        _set_experiment_ratings(g, preferences, random.Random(derive_seed(seed, i)))
+        fxn()
+        results.append((calculate_average_happiness(g.students_a),
+                        calculate_average_happiness(g.students_b),
+                        calculate_average_happiness(g.all_students)))
+        if monitor is not None and len(results) < len(run_indices):
+            monitor.check(runs_done=len(results), run_count=len(run_indices))
+    return results
+
+
+def _monitored(fxn, matchmaking_fxn: str, monitor: ProgressMonitor | None):
+    """
+    Returns fxn with the monitor passed in, if it is a Gale-Shapley match.
+
+    The other matchmaking methods don't take a monitor; their runs are only checked in between.
+    """
+    if monitor is None or matchmaking_fxn != "make_gale_shapely_partnerships":
+        return fxn
+    return lambda: fxn(monitor=monitor)
+
+
+def _set_experiment_ratings(g: Group, preferences: str, rng: random.Random | None = None):
+    """
+    Give a Group the preferences for one run of an experiment (see run_experiment).
+    """
+    if preferences == "random":
+        g.randomize_ratings(rng)
+    else:
+        import instances
+
+        instances.set_group_ratings(g, instances.hard_instance(preferences, len(g.students_a),
+                                                               rng or random.Random()))
+
+
+def _run_seeded_workspace(student_count: int, matchmaking_fxn: str, seed: int,
+                          run_indices: list[int], monitor: ProgressMonitor | None = None,
+                          preferences: str = "random") \
+        -> list[tuple[float, float, float]]:
+    """
+    The Workspace version of run_seeded.
+
+    Everything is allocated before the first run, so each run allocates O(1) memory
+        (except with hard preferences, whose instances are built for every run).
+    """
+    from engines import Workspace
+
+    workspace = Workspace(student_count)
+    fxns = {
+        "make_gale_shapely_partnerships": workspace.match,
+        "make_naive_partnerships": workspace.match_naive,
+        "make_max_welfare_partnerships": workspace.match_max_welfare,
+    }
+    if matchmaking_fxn not in fxns:
+        raise ValueError(f"A Workspace cannot run {matchmaking_fxn!r}")
+    fxn = _monitored(fxns[matchmaking_fxn], matchmaking_fxn, monitor)
+
+    rng = random.Random()
+    results = []
+    for i in run_indices:
+        rng.seed(derive_seed(seed, i))
+        if preferences == "random":
+            workspace.randomize(rng)
+        else:
+            import instances
+
+            workspace.load(instances.hard_instance(preferences, student_count, rng))
+        fxn()
+        results.append(workspace.happiness())
+        if monitor is not None and len(results) < len(run_indices):
+            monitor.check(runs_done=len(results), run_count=len(run_indices))
+    return results
+
+
+def _run_seeded_lazy(student_count: int, matchmaking_fxn: str, seed: int,
+                     run_indices: list[int], monitor: ProgressMonitor | None = None) \
+        -> list[tuple[float, float, float]]:
+    """
+    The lazy-random-preferences version of run_seeded.
+
+    Preferences are only drawn as far as the algorithm looks at them,
+    so each run takes near-linear time and memory.
+    """
+    import lazy_random
+
+    fxns = {
+        "make_gale_shapely_partnerships": lazy_random.lazy_random_match,
+        "make_naive_partnerships": lazy_random.lazy_random_naive,
+    }
+    if matchmaking_fxn not in fxns:
+        raise ValueError(f"Lazy random preferences cannot run {matchmaking_fxn!r}")
+    fxn = fxns[matchmaking_fxn]
+    monitored = monitor is not None and matchmaking_fxn == "make_gale_shapely_partnerships"
+
+    rng = random.Random()
+    results = []
+    for i in run_indices:
+        rng.seed(derive_seed(seed, i))
+        if monitored:
+            _, _, ratings_a, ratings_b = fxn(student_count, rng, monitor)
+        else:
+            _, _, ratings_a, ratings_b = fxn(student_count, rng)
+        results.append(lazy_random.happiness_from_ratings(ratings_a, ratings_b))
+        if monitor is not None and len(results) < len(run_indices):
+            monitor.check(runs_done=len(results), run_count=len(run_indices))
+    return results
+
+
+def replay_run(student_count: int, seed: int, run_index: int,
+               matchmaking_fxn: str = "make_gale_shapely_partnerships",
+               preferences: str = "random") -> Group:
+    """
+    Recompute a single run of a seeded experiment, for debugging.
+
+    Returns the Group exactly as it was after matchmaking in that run of
+        run_experiment(student_count, ..., matchmaking_fxn, seed=seed, preferences=preferences)
+    without rerunning any of the other runs.
+    """
+    g = make_experiment_group(student_count)
+    _set_experiment_ratings(g, preferences, random.Random(derive_seed(seed, run_index)))
+    getattr(g, matchmaking_fxn)()
+    return g
+
+
 def run_experiment(student_count: int = 10,
                    run_count: int = 10,
-                   matchmaking_fxn: int = "make_gale_shapely_partnerships") \
+                   matchmaking_fxn: int = "make_gale_shapely_partnerships",
+                   seed: int | None = None,
+                   processes: int = 1,
+                   engine: str = "group",
+                   monitor: ProgressMonitor | None = None,
+                   preferences: str = "random") \
         -> dict[str, int | float]:
     """
     Returns the result of running an experiment as a dictionary
@@ -393,18 +822,43 @@ def run_experiment(student_count: int = 10,
         randomize the group's ratings
         call the correct method on the group
         calculate and add the total happiness for group A, B, and all students
+
+    If seed is given, the experiment is reproducible: each run uses its own
+        random stream (see derive_seed), and replay_run() can recompute any one run.
+    If processes is more than 1, the runs are split across that many processes.
+        The results are identical, bit-for-bit, to running with processes=1.
+    engine chooses how the runs are carried out:
+        "group" (the default) uses a Group of Students, as described above.
+        "workspace" reuses the preallocated buffers of an engines.Workspace,
+            which is much faster for big groups.
+        "lazy" draws random preferences only as far as the algorithm looks
+            at them (see lazy_random.py), for groups of up to ~100,000 students.
+        The engines draw ratings differently, so a seed gives different
+        (but equally random) results with each engine.
+    If a ProgressMonitor is given, it hears about progress after each run,
+        and can cancel the experiment or give it a time budget
+        (it then raises MatchCancelled).
+    preferences is one of EXPERIMENT_PREFERENCES:
+        "random" (the default) gives everyone uniformly random preferences.
+        The others are the hard instances in instances.HARD_INSTANCES, with
+            the students renumbered at random in each run. Random preferences
+            need only about n*ln(n) proposals; these need up to n^2 - n + 1,
+            so they measure how long a match takes at worst (see run_benchmark).
     """
     # Uncomment this to print which experiment we are running
     # print(f"\n----\nRun experiment with {student_count} students for {run_count} runs ({matchmaking_fxn})\n")
 
-    # Setup the groups
-    # We need unique names, but because this is an experiement,
-    #   we don't need them to be memorable
-    # Create names ["A0", "A1", ..] etc
+    if engine not in EXPERIMENT_ENGINES:
+        raise ValueError(f"engine must be one of {EXPERIMENT_ENGINES}, not {engine!r}")
+    if preferences not in EXPERIMENT_PREFERENCES:
+        raise ValueError(f"preferences must be one of {EXPERIMENT_PREFERENCES}, not {preferences!r}")
 
-    names_a = ["A" + str(i) for i in range(0, student_count)]
-    names_b = ["B" + str(i) for i in range(0, student_count)]
-    g = Group(names_a, names_b)
+    if seed is not None or processes > 1 or engine != "group" or preferences != "random":
+        return _run_seeded_experiment(student_count, run_count, matchmaking_fxn,
+                                      seed, processes, engine, monitor, preferences)
+
+    # Setup the groups
+    g = make_experiment_group(student_count)
 
     total_happiness_a = 0.0
     total_happiness_b = 0.0
@@ -435,15 +889,22 @@ def run_experiment(student_count: int = 10,
     start = time.perf_counter()
 
     fxn = getattr(g, matchmaking_fxn)  # Assign function to a variable!
+    fxn = _monitored(fxn, matchmaking_fxn, monitor)
 
+    if monitor is not None:
+        monitor.begin()
     for i in range(0, run_count):
         g.randomize_ratings()
         fxn()
         total_happiness_a += calculate_average_happiness(g.students_a)
         total_happiness_b += calculate_average_happiness(g.students_b)
         total_happiness += calculate_average_happiness(g.all_students)
+        if monitor is not None and i + 1 < run_count:
+            monitor.check(runs_done=i + 1, run_count=run_count)
 
     stop = time.perf_counter()
+    if monitor is not None:
+        monitor.finish(runs_done=run_count, run_count=run_count)
     total_time = (stop - start) / run_count
 
     # these calculations are provided for you
@@ -455,6 +916,9 @@ def run_experiment(student_count: int = 10,
         "matchmaking_fxn": matchmaking_fxn,
         "student_count": student_count,
         "run_count": run_count,
+        "seed": seed,
+        "engine": engine,
+        "preferences": preferences,
         "a": total_happiness_a / run_count,  # Average over *all runs*
         "b": total_happiness_b / run_count,
         "all": total_happiness / run_count,
@@ -462,6 +926,135 @@ def run_experiment(student_count: int = 10,
         "time": total_time * 1_000,  # Convert to milliseconds not seconds
     }
 
+def _run_seeded_experiment(student_count: int, run_count: int,
+                           matchmaking_fxn: str, seed: int | None,
+                           processes: int, engine: str,
+                           monitor: ProgressMonitor | None = None,
+                           preferences: str = "random") -> dict[str, int | float]:
+    """
+    The seeded (and possibly multi-process) version of run_experiment.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    if preferences != "random":
+        import instances  # noqa: F401 (imported now so that importing it isn't timed)
+
+    start = time.perf_counter()
+    if monitor is not None:
+        monitor.begin()
+
+    if processes > 1:
+        per_run = _run_seeded_in_processes(student_count, run_count, matchmaking_fxn,
+                                           seed, processes, engine, monitor, preferences)
+    else:
+        per_run = run_seeded(student_count, matchmaking_fxn, seed, range(run_count),
+                             engine, monitor, preferences)
+
+    stop = time.perf_counter()
+    if monitor is not None:
+        monitor.finish(runs_done=run_count, run_count=run_count)
+    total_time = (stop - start) / run_count
+
+    # Add up in run order, so that the floating-point totals
+    #   do not depend on how the runs were split up
+    total_happiness_a = 0.0
+    total_happiness_b = 0.0
+    total_happiness = 0.0
+    for happiness_a, happiness_b, happiness_all in per_run:
+        total_happiness_a += happiness_a
+        total_happiness_b += happiness_b
+        total_happiness += happiness_all
+
+    return {
+        "matchmaking_fxn": matchmaking_fxn,
+        "student_count": student_count,
+        "run_count": run_count,
+        "seed": seed,
+        "engine": engine,
+        "preferences": preferences,
+        "a": total_happiness_a / run_count,
+        "b": total_happiness_b / run_count,
+        "all": total_happiness / run_count,
+        "unfairness": total_happiness_a / total_happiness_b,
+        "time": total_time * 1_000,
+    }
+
+
+def _run_seeded_in_processes(student_count: int, run_count: int, matchmaking_fxn: str,
+                             seed: int, processes: int, engine: str,
+                             monitor: ProgressMonitor | None,
+                             preferences: str) -> list[tuple[float, float, float]]:
+    """
+    Run the runs of a seeded experiment in a pool of processes, in contiguous chunks.
+
+    With a monitor, there are a few chunks per process, so that it hears about
+    progress as chunks finish. The workers' matches check a shared event,
+    which is set as soon as the monitor says to stop, so that even a
+    single long run stops part of the way through.
+    """
+    # Imported here because they are slow to import and rarely needed
+    import contextlib
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+    if monitor is None:
+        chunk_count = processes
+        stop = None
+        manager = contextlib.nullcontext()
+    else:
+        chunk_count = min(run_count, processes * 4)
+        manager = multiprocessing.Manager()
+    chunks = [list(range(run_count * c // chunk_count, run_count * (c + 1) // chunk_count))
+              for c in range(chunk_count)]
+    per_run = []
+    with manager, ProcessPoolExecutor(processes) as executor:
+        if monitor is not None:
+            stop = manager.Event()
+        worker_monitor = ProgressMonitor(cancel=stop) if stop is not None else None
+        futures = [executor.submit(run_seeded, student_count, matchmaking_fxn, seed, chunk,
+                                   engine, worker_monitor, preferences)
+                   for chunk in chunks]
+        try:
+            for future in futures:
+                while True:
+                    try:
+                        # While waiting, keep checking whether we should stop
+                        per_run.extend(future.result(timeout=None if monitor is None else 0.1))
+                        break
+                    except TimeoutError:
+                        monitor.check(runs_done=len(per_run), run_count=run_count)
+                if monitor is not None and len(per_run) < run_count:
+                    monitor.check(runs_done=len(per_run), run_count=run_count)
+        except MatchCancelled:
+            stop.set()
+            for future in futures:
+                future.cancel()
+            raise
+    return per_run
+
+
+def run_benchmark(student_count: int, run_count: int = 10,
+                  matchmaking_fxn: str = "make_gale_shapely_partnerships",
+                  preferences: tuple[str] = EXPERIMENT_PREFERENCES,
+                  **kwargs) -> dict[str, dict[str, int | float]]:
+    """
+    Run the same experiment with random preferences and with each kind of hard instance.
+
+    Random preferences show the typical time a match takes, and the hard
+    instances the worst; comparing them shows how far apart the two are.
+
+    Args:
+        preferences (tuple[str]): Which of EXPERIMENT_PREFERENCES to run.
+        Everything else is passed on to run_experiment (e.g. seed=, engine=).
+
+    Returns:
+        dict: run_experiment's result for each kind of preferences.
+    """
+    return {name: run_experiment(student_count, run_count, matchmaking_fxn,
+                                 preferences=name, **kwargs)
+            for name in preferences}
+
+
 # Use this to easily print the results of any test
 def print_test_result(result):
     print(
@@ -0,0 +1,134 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Generators of matching instances, from typical to worst-case.
+
+Uniformly random preferences are the easy case for Gale-Shapley: only about
+n*ln(n) proposals are made. Testing and benchmarking only on them hides how
+the engines behave when the algorithm has to work hard, so this module
+also builds instances with a known (large) number of proposals.
+
+Every generator returns PreferenceTables (see engines.py). The hard ones are
+listed in HARD_INSTANCES, so that run_experiment(preferences=...) and the
+benchmarks can run them alongside random preferences.
+"""
+
+import random
+
+from engines import PreferenceTables
+
+
+def random_instance(size: int, rng: random.Random | None = None,
+                    keep: float = 1.0) -> PreferenceTables:
+    """
+    Returns uniformly random preferences for two groups of size students.
+
+    With keep below 1, each student only rates each member of the other group
+        with that probability, giving incomplete lists (possibly empty ones).
+    """
+    if rng is None:
+        rng = random  # the module has the same methods as a Random
+
+    def make_prefs() -> list[list[int]]:
+        prefs = []
+        for _ in range(size):
+            pref = list(range(size))
+            rng.shuffle(pref)
+            if keep < 1:
+                pref = [other for other in pref if rng.random() < keep]
+            prefs.append(pref)
+        return prefs
+
+    return PreferenceTables(make_prefs(), make_prefs())
+
+
+def identical_lists_instance(size: int) -> PreferenceTables:
+    """
+    Returns an instance where every A student has the same list, and B agrees in reverse.
+
+    Everyone in group A wants B0 most, then B1, and so on. Every B student
+    prefers whoever proposes later (A(n-1) most), so each new proposer
+    displaces the last. That makes n*(n+1)/2 proposals.
+    """
+    prefs_a = [list(range(size)) for _ in range(size)]
+    prefs_b = [list(range(size - 1, -1, -1)) for _ in range(size)]
+    return PreferenceTables(prefs_a, prefs_b)
+
+
+def worst_case_instance(size: int) -> PreferenceTables:
+    """
+    Returns an instance that makes the most proposals possible: n^2 - n + 1.
+
+    With m = n - 1, group A competes for B0..B(m-1) in rotated orders:
+        A student i < m lists B i, B i+1, ..., wrapping around below m, then Bm last.
+        A student m lists B0, B1, ..., B(m-1), then Bm, the same as A0.
+    Each B student j < m likes A (j+1) mod m most, then Am, then the others.
+    Between them, the A students propose to every one of B0..B(m-1)
+    (n*(n-1) proposals), and the algorithm only ends when the A student
+    left over finally proposes to Bm.
+    """
+    if size <= 1:
+        return PreferenceTables([[0]] * size, [[0]] * size)
+    m = size - 1
+    prefs_a = [[(i + t) % m for t in range(m)] + [m] for i in range(m)]
+    prefs_a.append(list(range(size)))
+
+    prefs_b = []
+    for j in range(m):
+        first = (j + 1) % m
+        prefs_b.append([first, m] + [i for i in range(m) if i != first])
+    prefs_b.append(list(range(size)))
+    return PreferenceTables(prefs_a, prefs_b)
+
+
+# The instances with a known, large number of proposals, by name
+HARD_INSTANCES = {
+    "identical_lists": identical_lists_instance,
+    "worst_case": worst_case_instance,
+}
+
+
+def relabel(tables: PreferenceTables, rng: random.Random) -> PreferenceTables:
+    """
+    Returns the same instance with both groups' students renumbered at random.
+
+    The matching (and the number of proposals) is the same up to the renumbering,
+    but an engine can no longer get lucky, or unlucky, with index order.
+    """
+    new_a = list(range(len(tables.prefs_a)))
+    new_b = list(range(len(tables.prefs_b)))
+    rng.shuffle(new_a)
+    rng.shuffle(new_b)
+    prefs_a = [None] * len(new_a)
+    prefs_b = [None] * len(new_b)
+    for i, pref in enumerate(tables.prefs_a):
+        prefs_a[new_a[i]] = [new_b[j] for j in pref]
+    for j, pref in enumerate(tables.prefs_b):
+        prefs_b[new_b[j]] = [new_a[i] for i in pref]
+    return PreferenceTables(prefs_a, prefs_b)
+
+
+def hard_instance(name: str, size: int, rng: random.Random | None = None) -> PreferenceTables:
+    """
+    Returns the named instance from HARD_INSTANCES, relabelled with rng if one is given.
+    """
+    if name not in HARD_INSTANCES:
+        raise ValueError(f"name must be one of {tuple(HARD_INSTANCES)}, not {name!r}")
+    tables = HARD_INSTANCES[name](size)
+    return relabel(tables, rng) if rng is not None else tables
+
+
+def set_group_ratings(group, tables: PreferenceTables):
+    """
+    Give a Group the preferences in tables, matching students by position.
+
+    The Group needs as many students in each group as the tables.
+    """
+    names_a = [s.name for s in group.students_a]
+    names_b = [s.name for s in group.students_b]
+    # partner_ratings is LEAST to MOST preferred, the reverse of the proposal order
+    for s, pref in zip(group.students_a, tables.prefs_a):
+        s.partner_ratings = [names_b[j] for j in reversed(pref)]
+    for s, pref in zip(group.students_b, tables.prefs_b):
+        s.partner_ratings = [names_a[i] for i in reversed(pref)]
@@ -0,0 +1,164 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Gale-Shapley on uniformly random preferences, generated lazily.
+
+With uniformly random preferences, deferred acceptance only makes about
+n*ln(n) proposals, yet writing out everyone's preferences takes n^2 work.
+Here nothing is written out in advance:
+    - each proposer's next choice is drawn only when they propose,
+      by sampling without replacement from the B students they have not tried;
+    - a B student's rating of a proposer is drawn only when they meet,
+      by sampling without replacement from the ratings 0..n-1 they have not handed out.
+Both amount to shuffling everyone's preferences, but only as far as the
+algorithm actually looks. So a run takes near-linear time and memory,
+and experiments can use 100,000 students per group.
+
+The results have the same distribution as shuffling every student's
+partner_ratings, but the same seed does not give the same preferences.
+"""
+
+import math
+import random
+
+from engines import MONITOR_CHECK_EVERY
+
+
+class _LazyShuffles:
+    """
+    Many shuffles of 0..size-1, each only carried out as far as it has been read.
+
+    This is a "sparse" Fisher-Yates shuffle: drawing the k-th value of a
+    shuffle swaps a random position from k onwards into position k, and only
+    positions that have been swapped are stored, in one dictionary keyed by
+    shuffle * size + position. Memory grows with the number of draws, not size^2.
+
+    Attributes:
+        size (int): The length of each shuffle.
+        drawn (list[int]): How many values have been drawn from each shuffle.
+    """
+
+    def __init__(self, count: int, size: int, rng):
+        """
+        Start count shuffles of 0..size-1, drawing random numbers from rng.
+        """
+        self.size = size
+        self.drawn = [0] * count
+        self._swapped = {}
+        self._randrange = rng.randrange
+
+    def draw(self, shuffle: int) -> int:
+        """
+        Returns the next value of the given shuffle.
+        """
+        size = self.size
+        swapped = self._swapped
+        base = shuffle * size
+        k = self.drawn[shuffle]
+        r = self._randrange(k, size)
+        value = swapped.get(base + r, r)
+        if r != k:
+            swapped[base + r] = swapped.get(base + k, k)
+        swapped.pop(base + k, None)
+        self.drawn[shuffle] = k + 1
+        return value
+
+
+def lazy_random_match(size: int, rng: random.Random | None = None, monitor=None) \
+        -> tuple[list[int], int, list[int], list[int]]:
+    """
+    Run Gale-Shapley (group A proposing) on uniformly random, lazily drawn preferences.
+
+    Args:
+        size (int): The number of students in each group.
+        rng (random.Random | None): The random numbers to use
+            (the global random module if None).
+        monitor (ProgressMonitor | None): Checked every engines.MONITOR_CHECK_EVERY
+            proposals, so that it can cancel a long match.
+
+    Returns:
+        (partner_a, proposals, ratings_a, ratings_b):
+            partner_a[i] is the index of A student i's partner in group B,
+            proposals is how many proposals were made, and
+            ratings_a[i] / ratings_b[j] is how each student rates their partner,
+            on the same 0 (least) to size - 1 (most preferred) scale as
+            Student.get_rating_of_current_partner().
+    """
+    if rng is None:
+        rng = random  # the module has the same methods as a Random
+    # A's proposal orders: each A student's next choice, drawn as they propose
+    choices_a = _LazyShuffles(size, size, rng)
+    # B's ratings: the rating a B student gives each A student they meet
+    ratings_given = _LazyShuffles(size, size, rng)
+    draw_choice = choices_a.draw
+    draw_rating = ratings_given.draw
+
+    partner_a = [-1] * size
+    partner_b = [-1] * size
+    partner_rating = [-1] * size
+
+    free = list(range(size - 1, -1, -1))
+    proposals = 0
+    check_at = MONITOR_CHECK_EVERY if monitor is not None else math.inf
+
+    while free:
+        if proposals >= check_at:
+            monitor.check(proposals=proposals, free=len(free))
+            check_at = proposals + MONITOR_CHECK_EVERY
+        a = free.pop()
+        # a keeps proposing until someone accepts
+        while True:
+            b = draw_choice(a)
+            proposals += 1
+            # b meets a for the first (and only) time, and decides how to rate them
+            rating = draw_rating(b)
+            if rating > partner_rating[b]:
+                current = partner_b[b]
+                if current >= 0:
+                    partner_a[current] = -1
+                    free.append(current)
+                partner_b[b] = a
+                partner_rating[b] = rating
+                partner_a[a] = b
+                break
+
+    # a's partner was their drawn[a]-th choice, so a rates them size - drawn[a]
+    ratings_a = [size - drawn for drawn in choices_a.drawn]
+
+    return partner_a, proposals, ratings_a, partner_rating
+
+
+def lazy_random_naive(size: int, rng: random.Random | None = None) \
+        -> tuple[list[int], int, list[int], list[int]]:
+    """
+    Pair A student i with B student i, like Group.make_naive_partnerships(),
+    with uniformly random preferences.
+
+    Each student's rating of a fixed partner is just a uniform random rating,
+    so nothing else needs to be drawn.
+
+    Returns:
+        (partner_a, proposals, ratings_a, ratings_b): as for lazy_random_match(),
+            with 0 proposals.
+    """
+    if rng is None:
+        rng = random  # the module has the same methods as a Random
+    ratings_a = [rng.randrange(size) for _ in range(size)]
+    ratings_b = [rng.randrange(size) for _ in range(size)]
+    return list(range(size)), 0, ratings_a, ratings_b
+
+
+def happiness_from_ratings(ratings_a: list[int], ratings_b: list[int]) \
+        -> tuple[float, float, float]:
+    """
+    Returns the average (A, B, all) happiness, given each student's rating of their partner.
+
+    Uses the same formula as calculate_average_happiness() in gale_shapley.py.
+    """
+    options = len(ratings_a) - 1
+    total_a = sum(ratings_a)
+    total_b = sum(ratings_b)
+    return (total_a / (len(ratings_a) * options),
+            total_b / (len(ratings_b) * options),
+            (total_a + total_b) / ((len(ratings_a) + len(ratings_b)) * options))
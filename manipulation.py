@@ -0,0 +1,205 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Can a B student do better by lying about their preferences?
+
+Gale-Shapley with group A proposing is safe for group A: no A student can
+get a better partner by misreporting. Group B has no such guarantee. A B
+student can sometimes get a better partner by *truncating* their list, i.e.
+claiming that the A students they like least are not acceptable at all.
+
+For each B student this module tries every truncation that could matter,
+and reports who can improve and by how much.
+
+Each truncation is not rerun from scratch. Truncations are nested: claiming
+fewer students are acceptable only adds rejections, and every rejection
+made under a longer list is still a valid rejection under a shorter one.
+So, starting from the honest run's final state, B student b:
+    1. rejects their current partner (declaring them and everyone worse unacceptable),
+    2. lets deferred acceptance carry on from there (engines.propose_until_done),
+    3. repeats with their new partner, until they end up unpartnered.
+Every step is exactly what a full rerun with that truncated list would give,
+but it usually only takes a few proposals.
+
+No truncation can get b a better partner than their partner in the
+B-optimal stable matching (Gale and Sotomayor), and truncating any further
+only leaves b unpartnered. So the search stops once b reaches that partner,
+found with one B-proposing run. That skips the last truncation, which is the
+expensive one: b is left unpartnered only after some A student has been
+turned down by everyone left on their list.
+"""
+
+from engines import (PreferenceTables, gale_shapley_python, propose_until_done,
+                     tables_from_group)
+
+
+def honest_state(tables: PreferenceTables) -> tuple[list[int], list[int], list[int]]:
+    """
+    Run deferred acceptance with group A proposing, and return its final state.
+
+    Returns:
+        (partner_a, partner_b, next_choice): as used by engines.propose_until_done().
+    """
+    partner_a = [-1] * len(tables.prefs_a)
+    partner_b = [-1] * len(tables.prefs_b)
+    next_choice = [0] * len(tables.prefs_a)
+    free = list(range(len(tables.prefs_a) - 1, -1, -1))
+    propose_until_done(tables, partner_a, partner_b, next_choice, free)
+    return partner_a, partner_b, next_choice
+
+
+def b_optimal_partners(tables: PreferenceTables) -> list[int]:
+    """
+    Returns each B student's partner in the B-optimal stable matching (or -1).
+
+    That is the matching deferred acceptance gives with group B proposing.
+    """
+    partner_b, _ = gale_shapley_python(PreferenceTables(tables.prefs_b, tables.prefs_a))
+    return partner_b
+
+
+def best_truncation(tables: PreferenceTables, b: int,
+                    honest: tuple[list[int], list[int], list[int]],
+                    b_optimal: int | None = None) -> dict[str, int | None]:
+    """
+    Find B student b's best truncation strategy, starting from the honest run's state.
+
+    If b's B-optimal stable partner is given, stops once b reaches them, since
+        no truncation can do better. Otherwise tries truncations until b ends up unpartnered.
+    The tables are changed while this runs, and put back before it returns.
+
+    Returns:
+        dict: "b", b's "honest_partner" and "honest_rating", the "best_partner"
+            and "best_rating" (by b's *true* ratings) any truncation gets them,
+            "keep", how many of their top choices to list to get it (None if
+            telling the truth is best), "strategies" tried and the extra
+            "proposals" the searches needed.
+    """
+    partner_a, partner_b, next_choice = (state[:] for state in honest)
+    row = tables.ranks_b[b]
+    pref = tables.prefs_b[b]
+    honest_partner = partner_b[b]
+    honest_rating = row[honest_partner] if honest_partner >= 0 else -1
+    result = {
+        "b": b,
+        "honest_partner": honest_partner,
+        "honest_rating": honest_rating,
+        "best_partner": honest_partner,
+        "best_rating": honest_rating,
+        "keep": None,
+        "strategies": 0,
+        "proposals": 0,
+    }
+
+    # b's *reported* ratings, cut shorter at each step
+    reported = row[:]
+    keep = len(pref)
+    tables.ranks_b[b] = reported
+    try:
+        while partner_b[b] >= 0 and partner_b[b] != b_optimal:
+            current = partner_b[b]
+            # List only the students b likes more than their current partner
+            new_keep = len(pref) - 1 - row[current]
+            for a in pref[new_keep:keep]:
+                reported[a] = -1
+            keep = new_keep
+
+            partner_b[b] = -1
+            partner_a[current] = -1
+            result["strategies"] += 1
+            result["proposals"] += propose_until_done(tables, partner_a, partner_b,
+                                                      next_choice, [current])
+
+            partner = partner_b[b]
+            if partner >= 0 and row[partner] > result["best_rating"]:
+                result["best_partner"] = partner
+                result["best_rating"] = row[partner]
+                result["keep"] = keep
+    finally:
+        tables.ranks_b[b] = row
+    return result
+
+
+def _search_chunk(tables: PreferenceTables, honest: tuple[list[int], list[int], list[int]],
+                  b_optimal: list[int], students: list[int]) -> list[dict[str, int | None]]:
+    """
+    Run best_truncation() for several B students (one process's share of the work).
+    """
+    return [best_truncation(tables, b, honest, b_optimal[b]) for b in students]
+
+
+def find_manipulations(tables: PreferenceTables, students: list[int] | None = None,
+                       processes: int = 1) -> list[dict[str, int | None]]:
+    """
+    Search every B student's truncation strategies.
+
+    Args:
+        tables (PreferenceTables): The preferences.
+        students (list[int] | None): Which B students to check (all of them by default).
+        processes (int): If more than 1, the students are split across that many processes.
+
+    Returns:
+        list[dict]: best_truncation()'s result for each student, in order.
+    """
+    if students is None:
+        students = list(range(len(tables.prefs_b)))
+    honest = honest_state(tables)
+    b_optimal = b_optimal_partners(tables)
+
+    if processes <= 1:
+        return _search_chunk(tables, honest, b_optimal, students)
+
+    # Imported here because it is slow to import and rarely needed
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Split the students into one contiguous chunk per process
+    count = len(students)
+    chunks = [students[count * p // processes:count * (p + 1) // processes]
+              for p in range(processes)]
+    results = []
+    with ProcessPoolExecutor(processes) as executor:
+        for chunk_results in executor.map(_search_chunk, [tables] * processes,
+                                          [honest] * processes, [b_optimal] * processes,
+                                          chunks):
+            results.extend(chunk_results)
+    return results
+
+
+def manipulation_report(group, processes: int = 1) -> list[dict[str, str | int | list[str]]]:
+    """
+    Returns the B students in a Group who can get a better partner by truncating their list.
+
+    Returns:
+        list[dict]: For each such student, their "name", "honest_partner" and
+            "best_partner" names, the "gain" in their (true) rating of their
+            partner, and the truncated "partner_ratings" that achieves it.
+    """
+    tables = tables_from_group(group)
+    report = []
+    for result in find_manipulations(tables, processes=processes):
+        if result["keep"] is None:
+            continue
+        b = result["b"]
+        student = group.students_b[b]
+        honest_partner = result["honest_partner"]
+        report.append({
+            "name": student.name,
+            "honest_partner": tables.names_a[honest_partner] if honest_partner >= 0 else None,
+            "best_partner": tables.names_a[result["best_partner"]],
+            "gain": result["best_rating"] - result["honest_rating"],
+            # partner_ratings is LEAST to MOST preferred, so keep the end of the list
+            "partner_ratings": [tables.names_a[a] for a in reversed(tables.prefs_b[b][:result["keep"]])],
+        })
+    return report
+
+
+def print_manipulation_report(report: list[dict[str, str | int | list[str]]]):
+    """
+    Print who can gain by truncating their preferences.
+    """
+    if not report:
+        print("Nobody in group B can gain by truncating their preferences")
+    for entry in report:
+        print(f"{entry['name']:10} {entry['honest_partner']} -> {entry['best_partner']} "
+              f"(+{entry['gain']}) by listing only {', '.join(reversed(entry['partner_ratings']))}")
@@ -0,0 +1,156 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Reading and writing preferences and matchings.
+
+Preferences are stored as JSON in the same shape that Group.set_ratings() takes,
+with one mapping per group:
+    {
+        "a": {"Ana": ["Bob", "Brian", ...], ...},
+        "b": {"Bob": ["Amelia", "Alastair", ...], ...}
+    }
+Each list is ordered from LEAST to MOST preferred, just like Student.partner_ratings.
+A single pool of students (see roommates.py) is stored the same way, under "students".
+
+Matchings are written as CSV with one row per partnership.
+"""
+
+import csv
+import json
+
+from engines import PreferenceTables, tables_from_ratings
+from gale_shapley import Group, Student
+from roommates import Pool, pool_tables
+
+
+def read_preferences(path: str) -> tuple[dict[str, list[str]], dict[str, list[str]]]:
+    """
+    Returns the (group A, group B) preference mappings stored in a JSON file.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if "a" not in data or "b" not in data:
+        raise ValueError(f"{path}: expected preferences for groups 'a' and 'b'")
+    return data["a"], data["b"]
+
+
+def write_preferences(path: str, group: Group):
+    """
+    Save every student's partner_ratings in a Group to a JSON file.
+    """
+    data = {
+        "a": {s.name: s.partner_ratings for s in group.students_a},
+        "b": {s.name: s.partner_ratings for s in group.students_b},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def group_from_file(path: str) -> Group:
+    """
+    Returns a new Group with the preferences stored in a JSON file.
+    """
+    ratings_a, ratings_b = read_preferences(path)
+    group = Group(list(ratings_a), list(ratings_b))
+    group.set_ratings(ratings_a)
+    group.set_ratings(ratings_b)
+    return group
+
+
+def tables_from_file(path: str) -> PreferenceTables:
+    """
+    Returns the preferences stored in a JSON file as PreferenceTables.
+
+    This skips building Student objects, which matters for big instances.
+    """
+    return tables_from_ratings(*read_preferences(path))
+
+
+def read_pool_preferences(path: str) -> dict[str, list[str]]:
+    """
+    Returns the preference mapping of a single pool stored in a JSON file.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if "students" not in data:
+        raise ValueError(f"{path}: expected preferences for 'students'")
+    return data["students"]
+
+
+def write_pool_preferences(path: str, pool: Pool):
+    """
+    Save every student's partner_ratings in a Pool to a JSON file.
+    """
+    data = {"students": {s.name: s.partner_ratings for s in pool.students}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def pool_from_file(path: str) -> Pool:
+    """
+    Returns a new Pool with the preferences stored in a JSON file.
+    """
+    ratings = read_pool_preferences(path)
+    pool = Pool(list(ratings))
+    pool.set_ratings(ratings)
+    return pool
+
+
+def pool_tables_from_file(path: str) -> PreferenceTables:
+    """
+    Returns the pool preferences stored in a JSON file as PreferenceTables (see roommates.pool_tables()).
+    """
+    return pool_tables(pool_from_file(path))
+
+
+def write_matching(path: str, group: Group):
+    """
+    Save a Group's current partnerships to a CSV file.
+
+    Columns: a, b, a_rating, b_rating.
+    Unpartnered A students are written with an empty b column and a rating of -1.
+    """
+    _write_partnerships(path, group.students_a)
+
+
+def write_roommate_matching(path: str, pool: Pool):
+    """
+    Save a Pool's current partnerships to a CSV file, in the same format as write_matching().
+
+    Each pair is written once, in the row of whichever student comes first in the pool.
+    """
+    written = set()
+    students = []
+    for s in pool.students:
+        if id(s) not in written:
+            students.append(s)
+            written.add(id(s))
+            if s.partner:
+                written.add(id(s.partner))
+    _write_partnerships(path, students)
+
+
+def _write_partnerships(path: str, students: list[Student]):
+    """
+    Write one CSV row for each student in students and their partner.
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["a", "b", "a_rating", "b_rating"])
+        for a in students:
+            b = a.partner
+            writer.writerow([
+                a.name,
+                b.name if b else "",
+                a.get_rating_of_current_partner(),
+                b.get_rating_of_current_partner() if b else -1,
+            ])
+
+
+def read_matching(path: str) -> dict[str, str | None]:
+    """
+    Returns the partnerships stored in a CSV file as {a name: b name or None}.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        return {row["a"]: row["b"] or None for row in csv.DictReader(f)}
@@ -0,0 +1,81 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Pure-Python metric kernels for index-based matchings.
+
+These work on a PreferenceTables (see engines.py) and a partner_a list,
+where partner_a[i] is the index of A student i's partner in group B, or -1.
+Use engines.get_kernel("happiness") / engines.get_kernel("stability")
+to get the fastest available version instead of calling these directly.
+"""
+
+
+def partner_b_from_partner_a(partner_a: list[int], count_b: int) -> list[int]:
+    """
+    Returns the matching from group B's point of view.
+
+    partner_b[j] is the index of B student j's partner in group A, or -1.
+    """
+    partner_b = [-1] * count_b
+    for i, j in enumerate(partner_a):
+        if j >= 0:
+            partner_b[j] = i
+    return partner_b
+
+
+def happiness_python(tables, partner_a: list[int]) -> dict[str, float]:
+    """
+    Returns the average happiness of group A, group B and all students.
+
+    Uses the same formula as calculate_average_happiness() in gale_shapley.py:
+        the sum of everyone's rating of their partner (-1 if unpartnered),
+        divided by (student count * (option count - 1)),
+        where the option count is taken from the first student.
+    For "all", each group's ratings are scaled by their own option count, so
+        groups of different sizes are on the same 0 to 1 scale. With equal-sized
+        groups, as in a Group, this is the same as calculate_average_happiness().
+    """
+    partner_b = partner_b_from_partner_a(partner_a, len(tables.prefs_b))
+
+    total_a = 0
+    for i, j in enumerate(partner_a):
+        total_a += tables.ranks_a[i][j] if j >= 0 else -1
+
+    total_b = 0
+    for j, i in enumerate(partner_b):
+        total_b += tables.ranks_b[j][i] if i >= 0 else -1
+
+    count_a = len(tables.prefs_a)
+    count_b = len(tables.prefs_b)
+    options_a = len(tables.prefs_a[0]) - 1
+    options_b = len(tables.prefs_b[0]) - 1
+    return {
+        "a": total_a / (count_a * options_a),
+        "b": total_b / (count_b * options_b),
+        "all": (total_a / options_a + total_b / options_b) / (count_a + count_b),
+    }
+
+
+def blocking_pairs_python(tables, partner_a: list[int]) -> list[tuple[int, int]]:
+    """
+    Returns every blocking pair (i, j) of the matching.
+
+    A and B students i and j block the matching if they rated each other and
+    both prefer each other to their current partners (being unpartnered is worse
+    than any rated partner). A matching is stable when this list is empty.
+    """
+    partner_b = partner_b_from_partner_a(partner_a, len(tables.prefs_b))
+    current_b = [tables.ranks_b[j][i] if i >= 0 else -1
+                 for j, i in enumerate(partner_b)]
+
+    blocking = []
+    for i, prefs in enumerate(tables.prefs_a):
+        partner = partner_a[i]
+        # prefs is in proposal order, so everyone before our partner is preferred
+        for j in prefs:
+            if j == partner:
+                break
+            if tables.ranks_b[j][i] > current_b[j]:
+                blocking.append((i, j))
+    return blocking
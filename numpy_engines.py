@@ -0,0 +1,238 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+NumPy versions of the matching and metric kernels.
+
+This module imports NumPy, so nothing else imports it directly:
+engines.get_kernel() loads it on demand, only when NumPy is installed
+and the kernel is asked for (or is faster at that size).
+"""
+
+import numpy as np
+
+from engines import propose_until_done
+
+# Vectorized rounds stop paying off once only a few proposers are free
+# (random instances have a long tail of rounds with one proposal each),
+# so below this many free proposers we finish with the sequential loop.
+SEQUENTIAL_TAIL = 64
+
+
+def _arrays(tables):
+    """
+    Returns NumPy copies of a PreferenceTables, building them only once.
+
+    Returns:
+        (prefs_a, lengths_a, ranks_a, ranks_b): prefs_a is padded with -1
+            so every row has the same length, and lengths_a holds the real lengths.
+    """
+    if "numpy" not in tables.cache:
+        lengths_a = np.array([len(p) for p in tables.prefs_a], dtype=np.int64)
+        width = int(lengths_a.max()) if len(lengths_a) else 0
+        prefs_a = np.full((len(tables.prefs_a), width), -1, dtype=np.int64)
+        for i, pref in enumerate(tables.prefs_a):
+            prefs_a[i, :len(pref)] = pref
+        ranks_a = np.array(tables.ranks_a, dtype=np.int64).reshape(
+            len(tables.prefs_a), len(tables.prefs_b))
+        ranks_b = np.array(tables.ranks_b, dtype=np.int64).reshape(
+            len(tables.prefs_b), len(tables.prefs_a))
+        tables.cache["numpy"] = (prefs_a, lengths_a, ranks_a, ranks_b)
+    return tables.cache["numpy"]
+
+
+def gale_shapley_numpy(tables, sequential_tail: int = SEQUENTIAL_TAIL) -> tuple[list[int], int]:
+    """
+    Run deferred acceptance with group A proposing, one round at a time.
+
+    In each round every free proposer proposes to their next choice at once,
+    and each B student keeps the best of their new proposals and current partner.
+    Once fewer than sequential_tail proposers are free, the rest of the run
+    is handed to engines.propose_until_done(). (Tests pass 1 to run every
+    round vectorized, even on small instances.)
+    Deferred acceptance gives the same A-optimal matching whatever order
+    the proposals are made in, so this agrees with gale_shapley_python().
+
+    Returns:
+        (partner_a, proposals): see engines.gale_shapley_python().
+    """
+    prefs_a, lengths_a, _, ranks_b = _arrays(tables)
+    count_a = len(lengths_a)
+
+    partner_a = np.full(count_a, -1, dtype=np.int64)
+    partner_b = np.full(ranks_b.shape[0], -1, dtype=np.int64)
+    next_choice = np.zeros(count_a, dtype=np.int64)
+    free = np.arange(count_a, dtype=np.int64)
+    proposals = 0
+
+    while free.size >= max(sequential_tail, 1):
+        # Proposers with nobody left to propose to stay unpartnered
+        free = free[next_choice[free] < lengths_a[free]]
+        if not free.size:
+            break
+
+        targets = prefs_a[free, next_choice[free]]
+        next_choice[free] += 1
+        proposals += free.size
+        ranks = ranks_b[targets, free]
+
+        # Pick each target's favourite proposer this round
+        order = np.lexsort((-ranks, targets))
+        sorted_targets = targets[order]
+        first = np.ones(order.size, dtype=bool)
+        first[1:] = sorted_targets[1:] != sorted_targets[:-1]
+        best = order[first]
+        best_targets = targets[best]
+        best_proposers = free[best]
+
+        # ...and compare them with the target's current partner
+        current = partner_b[best_targets]
+        current_ranks = np.where(
+            current >= 0, ranks_b[best_targets, np.maximum(current, 0)], -1)
+        accepted = ranks[best] > current_ranks
+
+        won_targets = best_targets[accepted]
+        winners = best_proposers[accepted]
+        dumped = current[accepted]
+        dumped = dumped[dumped >= 0]
+
+        partner_a[dumped] = -1
+        partner_b[won_targets] = winners
+        partner_a[winners] = won_targets
+
+        still_free = np.ones(free.size, dtype=bool)
+        still_free[best[accepted]] = False
+        free = np.concatenate((free[still_free], dumped))
+
+    partner_a = partner_a.tolist()
+    proposals += propose_until_done(tables, partner_a, partner_b.tolist(),
+                                    next_choice.tolist(), free[::-1].tolist())
+    return partner_a, int(proposals)
+
+
+def _current_ranks(tables, partner_a):
+    """
+    Returns each student's rating of their partner (-1 if unpartnered), for both groups.
+
+    Only the n partners' ratings are needed, so this reads them straight from
+    the tables unless the full arrays have already been built.
+    """
+    partner_a = np.asarray(partner_a, dtype=np.int64)
+    matched_a = np.flatnonzero(partner_a >= 0)
+    matched_b = partner_a[matched_a]
+
+    current_a = np.full(len(tables.prefs_a), -1, dtype=np.int64)
+    current_b = np.full(len(tables.prefs_b), -1, dtype=np.int64)
+    if "numpy" in tables.cache:
+        _, _, ranks_a, ranks_b = tables.cache["numpy"]
+        current_a[matched_a] = ranks_a[matched_a, matched_b]
+        current_b[matched_b] = ranks_b[matched_b, matched_a]
+    else:
+        pairs = list(zip(matched_a.tolist(), matched_b.tolist()))
+        current_a[matched_a] = [tables.ranks_a[i][j] for i, j in pairs]
+        current_b[matched_b] = [tables.ranks_b[j][i] for i, j in pairs]
+    return current_a, current_b
+
+
+def happiness_numpy(tables, partner_a: list[int]) -> dict[str, float]:
+    """
+    Returns the average happiness of group A, group B and all students.
+
+    See metrics.happiness_python() for the formula.
+    """
+    current_a, current_b = _current_ranks(tables, partner_a)
+    total_a = int(current_a.sum())
+    total_b = int(current_b.sum())
+
+    count_a = len(tables.prefs_a)
+    count_b = len(tables.prefs_b)
+    options_a = len(tables.prefs_a[0]) - 1
+    options_b = len(tables.prefs_b[0]) - 1
+    return {
+        "a": total_a / (count_a * options_a),
+        "b": total_b / (count_b * options_b),
+        "all": (total_a / options_a + total_b / options_b) / (count_a + count_b),
+    }
+
+
+def blocking_pairs_numpy(tables, partner_a: list[int]) -> list[tuple[int, int]]:
+    """
+    Returns every blocking pair (i, j) of the matching.
+
+    See metrics.blocking_pairs_python() for the definition.
+    """
+    _, _, ranks_a, ranks_b = _arrays(tables)
+    current_a, current_b = _current_ranks(tables, partner_a)
+    blocking = (ranks_a > current_a[:, None]) & (ranks_b.T > current_b[None, :])
+    return [(int(i), int(j)) for i, j in np.argwhere(blocking)]
+
+
+def max_welfare_numpy(tables) -> list[int]:
+    """
+    Returns partner_a for the matching with the highest total rating.
+
+    See assignment.max_welfare_python().
+    """
+    _, _, ranks_a, ranks_b = _arrays(tables)
+    if ranks_a.shape[0] != ranks_b.shape[0]:
+        raise ValueError("Both groups must be the same size to assign everyone a partner")
+    return hungarian_numpy(-(ranks_a + ranks_b.T)).tolist()
+
+
+def hungarian_numpy(cost) -> "np.ndarray":
+    """
+    Returns the minimum-cost assignment of rows to columns of a square matrix.
+
+    The same algorithm as assignment.hungarian(), with the loops over
+    columns done by NumPy.
+    """
+    n = cost.shape[0]
+    cost = cost.astype(np.float64)
+    # Rows and columns are numbered from 1; column 0 is a dummy used by the search
+    u = np.zeros(n + 1)
+    v = np.zeros(n + 1)
+    row_of = np.zeros(n + 1, dtype=np.int64)
+    way = np.zeros(n + 1, dtype=np.int64)
+
+    # Column reduction and greedy start
+    v[1:] = cost.min(axis=0)
+    assigned = np.zeros(n + 1, dtype=bool)
+    for i in range(1, n + 1):
+        candidates = np.flatnonzero((cost[i - 1] == v[1:]) & (row_of[1:] == 0))
+        if candidates.size:
+            row_of[candidates[0] + 1] = i
+            assigned[i] = True
+
+    for i in np.flatnonzero(~assigned[1:]) + 1:
+        row_of[0] = i
+        j0 = 0
+        min_slack = np.full(n + 1, np.inf)
+        used = np.zeros(n + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = row_of[j0]
+            free = ~used[1:]
+            slack = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = j0
+            candidates = np.where(free, min_slack[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_slack[~used] -= delta
+            j0 = j1
+            # Stop as soon as we reach a free column
+            if row_of[j0] == 0:
+                break
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+
+    result = np.empty(n, dtype=np.int64)
+    result[row_of[1:] - 1] = np.arange(n)
+    return result
@@ -0,0 +1,246 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Recording and replaying what happens during a Gale-Shapley run.
+
+Working out why a student ended up with a particular partner used to mean
+re-running the match with prints added. Instead, pass a ProposalTrace to
+Group.make_gale_shapely_partnerships(), Workspace.match() or
+engines.gale_shapley_python(), and every event is recorded as it happens:
+    ACCEPT:  A student a proposed to B student b, and b accepted
+    REJECT:  A student a proposed to B student b, and b said no
+    BREAKUP: b dropped their partner a for someone they like more
+             (recorded just before the ACCEPT that caused it)
+Every proposal is either an ACCEPT or a REJECT, so the number of proposals
+is the number of those two events.
+
+Each event is a fixed-width 9-byte record packed into a preallocated bytearray,
+so recording is cheap enough to leave on. A trace can be saved to disk and
+queried later: replaying the records up to any step gives the partnerships at
+that step without rerunning the algorithm.
+
+Usage:
+    python proposal_trace.py trace.bin                 # summary and final matching
+    python proposal_trace.py trace.bin --step 120      # partnerships after 120 events
+    python proposal_trace.py trace.bin --student Ana   # everything that happened to Ana
+"""
+
+import argparse
+import json
+import struct
+
+# Event codes
+ACCEPT = 1
+REJECT = 2
+BREAKUP = 3
+EVENT_NAMES = {ACCEPT: "accept", REJECT: "reject", BREAKUP: "breakup"}
+
+# One record: event code, A student index, B student index
+_RECORD = struct.Struct("<BII")
+RECORD_SIZE = _RECORD.size
+
+# File header: magic, format version, record size, record count, length of the names JSON
+_HEADER = struct.Struct("<4sHHQI")
+_MAGIC = b"GSPT"
+_VERSION = 1
+
+
+class ProposalTrace:
+    """
+    A growable buffer of fixed-width event records for one match.
+
+    Attributes:
+        names_a (list[str]): The names of group A, by index.
+        names_b (list[str]): The names of group B, by index.
+        count (int): The number of events recorded so far.
+
+    The event codes are also available as trace.ACCEPT etc., so that the
+    matching code can record events without importing this module.
+    """
+
+    ACCEPT = ACCEPT
+    REJECT = REJECT
+    BREAKUP = BREAKUP
+
+    def __init__(self, names_a: list[str], names_b: list[str], capacity: int = 0):
+        """
+        Start an empty trace with room for capacity events before it has to grow.
+
+        By default there is room for 4 events per A student, which covers a
+            typical random match (about ln(n) proposals per proposer) without regrowing.
+        """
+        self.names_a = list(names_a)
+        self.names_b = list(names_b)
+        self.count = 0
+        capacity = capacity or 4 * max(len(self.names_a), 1)
+        self._buffer = bytearray(capacity * RECORD_SIZE)
+        self._index_a = {}
+        self._index_b = {}
+
+    def record(self, event: int, a: int, b: int):
+        """
+        Append one event about A student a and B student b (both indices).
+        """
+        offset = self.count * RECORD_SIZE
+        if offset == len(self._buffer):
+            # Double the buffer, so that growing costs O(1) per record on average
+            self._buffer.extend(bytes(len(self._buffer)))
+        _RECORD.pack_into(self._buffer, offset, event, a, b)
+        self.count += 1
+
+    def record_students(self, event: int, a, b):
+        """
+        Append one event about two Student objects, looked up by name.
+        """
+        if not self._index_a:
+            for i, name in enumerate(self.names_a):
+                self._index_a.setdefault(name, i)
+            for j, name in enumerate(self.names_b):
+                self._index_b.setdefault(name, j)
+        self.record(event, self._index_a[a.name], self._index_b[b.name])
+
+    def clear(self):
+        """
+        Forget every event, keeping the buffer for the next match.
+        """
+        self.count = 0
+
+    def records(self, start: int = 0, stop: int | None = None) -> list[tuple[int, int, int]]:
+        """
+        Returns the (event, a, b) records from step start up to (not including) step stop.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        view = memoryview(self._buffer)[start * RECORD_SIZE:stop * RECORD_SIZE]
+        return list(_RECORD.iter_unpack(view))
+
+    def proposal_count(self) -> int:
+        """
+        Returns the number of proposals recorded.
+        """
+        return sum(1 for event, _, _ in self.records() if event != BREAKUP)
+
+    def state_at(self, step: int | None = None) -> tuple[list[int], list[int]]:
+        """
+        Replay the first step events (all of them by default).
+
+        Returns:
+            (partner_a, partner_b): each student's partner index at that step, or -1.
+        """
+        partner_a = [-1] * len(self.names_a)
+        partner_b = [-1] * len(self.names_b)
+        for event, a, b in self.records(0, step):
+            if event == ACCEPT:
+                partner_a[a] = b
+                partner_b[b] = a
+            elif event == BREAKUP:
+                partner_a[a] = -1
+                partner_b[b] = -1
+        return partner_a, partner_b
+
+    def history(self, a: int | None = None, b: int | None = None) -> list[tuple[int, int, int, int]]:
+        """
+        Returns every (step, event, a, b) involving A student a and/or B student b.
+
+        Steps count from 0, so state_at(step + 1) is the state just after that event.
+        """
+        return [(step, event, ra, rb)
+                for step, (event, ra, rb) in enumerate(self.records())
+                if (a is None or ra == a) and (b is None or rb == b)]
+
+    def describe(self, step: int) -> str:
+        """
+        Returns a sentence describing the event at that step.
+        """
+        event, a, b = self.records(step, step + 1)[0]
+        name_a = self.names_a[a]
+        name_b = self.names_b[b]
+        if event == ACCEPT:
+            return f"{step}: {name_a} proposed to {name_b}, who accepted"
+        if event == REJECT:
+            return f"{step}: {name_a} proposed to {name_b}, who said no"
+        return f"{step}: {name_b} broke up with {name_a}"
+
+
+def trace_for_group(group, capacity: int = 0) -> ProposalTrace:
+    """
+    Returns an empty ProposalTrace for a Group's students.
+    """
+    return ProposalTrace([s.name for s in group.students_a],
+                         [s.name for s in group.students_b], capacity)
+
+
+def trace_for_tables(tables, capacity: int = 0) -> ProposalTrace:
+    """
+    Returns an empty ProposalTrace for PreferenceTables (students are named by index if unnamed).
+    """
+    names_a = tables.names_a or [str(i) for i in range(len(tables.prefs_a))]
+    names_b = tables.names_b or [str(j) for j in range(len(tables.prefs_b))]
+    return ProposalTrace(names_a, names_b, capacity)
+
+
+def write_trace(path: str, trace: ProposalTrace):
+    """
+    Save a trace to a binary file: a header, the names as JSON, then the raw records.
+    """
+    names = json.dumps({"a": trace.names_a, "b": trace.names_b}).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, RECORD_SIZE, trace.count, len(names)))
+        f.write(names)
+        f.write(memoryview(trace._buffer)[:trace.count * RECORD_SIZE])
+
+
+def read_trace(path: str) -> ProposalTrace:
+    """
+    Returns the trace saved in a file by write_trace().
+    """
+    with open(path, "rb") as f:
+        magic, version, record_size, count, names_size = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version != _VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f"{path}: not a version {_VERSION} proposal trace")
+        names = json.loads(f.read(names_size).decode("utf-8"))
+        data = f.read(count * RECORD_SIZE)
+    if len(data) != count * RECORD_SIZE:
+        raise ValueError(f"{path}: expected {count} records, the file is truncated")
+
+    trace = ProposalTrace(names["a"], names["b"], capacity=max(count, 1))
+    trace._buffer[:len(data)] = data
+    trace.count = count
+    return trace
+
+
+def main(argv: list[str] | None = None):
+    """
+    Print a summary of a saved trace, the partnerships at some step, or one student's history.
+    """
+    parser = argparse.ArgumentParser(description="Query a saved proposal trace.")
+    parser.add_argument("path", help="a file written by write_trace()")
+    parser.add_argument("--step", type=int, default=None,
+                        help="show the partnerships after this many events (default: the end)")
+    parser.add_argument("--student", default=None,
+                        help="show every event involving the student with this name")
+    args = parser.parse_args(argv)
+
+    trace = read_trace(args.path)
+    print(f"{trace.count} events, {trace.proposal_count()} proposals")
+
+    if args.student is not None:
+        if args.student in trace.names_a:
+            steps = trace.history(a=trace.names_a.index(args.student))
+        elif args.student in trace.names_b:
+            steps = trace.history(b=trace.names_b.index(args.student))
+        else:
+            parser.error(f"no student named {args.student!r}")
+        for step, _, _, _ in steps:
+            print(trace.describe(step))
+        return
+
+    step = trace.count if args.step is None else args.step
+    partner_a, _ = trace.state_at(step)
+    print(f"Partnerships after {step} events:")
+    for name, j in zip(trace.names_a, partner_a):
+        print(f"  {name:10} {trace.names_b[j] if j >= 0 else '(unpartnered)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Stable roommates: stable matching within a single pool of students.
+
+Sometimes there are no separate A and B groups, e.g. when peer mentors are
+paired with each other. Everyone ranks everyone else, and we want pairs such
+that no two students would both rather be with each other than their partners.
+Unlike the two-group problem, such a matching does not always exist.
+
+Irving's algorithm finds one, or reports that there is none, in O(n^2) time:
+    Phase 1: everyone proposes down their list, as in Gale-Shapley, and each
+        student who holds a proposal drops everyone they like less.
+    Phase 2: while someone still has more than one person left on their list,
+        find a "rotation" (a cycle of students who can all move down to their
+        second choice) and remove it.
+If anyone's list runs out, there is no stable matching.
+"""
+
+import random
+
+from engines import PreferenceTables, get_kernel
+from gale_shapley import Student, calculate_average_happiness
+
+
+class Pool:
+    """
+    A single pool of students who are matched with each other.
+
+    The roommates version of Group: students rate everyone else in the pool,
+    using the same Student class (partner_ratings is ordered from LEAST to
+    MOST preferred).
+
+    Attributes:
+        students (list[Student]): The students in the pool.
+        all_students (list[Student]): The same list, named as in Group.
+    """
+
+    def __init__(self, names: list[str]):
+        """
+        Initialize the Pool, giving every student shuffled ratings of everyone else.
+        """
+        self.students : list[Student] = []
+        for name in names:
+            ratings = [other for other in names if other != name]
+            random.shuffle(ratings)
+            self.students.append(Student(self, name, ratings))
+        self.all_students = self.students
+
+        self._students_by_name : dict[str, Student] = {}
+        for s in self.students:
+            self._students_by_name.setdefault(s.name, s)
+
+    def get_student_by_name(self, name: str) -> 'None | Student':
+        """
+        Return the student with that name, or None if that student is not found
+        """
+        return self._students_by_name.get(name)
+
+    def set_ratings(self, names_to_ratings: dict[str, list[str]]):
+        """
+        Set each named student's partner_ratings.
+        """
+        for name, partner_ratings in names_to_ratings.items():
+            self.get_student_by_name(name).partner_ratings = partner_ratings
+
+    def randomize_ratings(self, rng: random.Random | None = None):
+        """
+        Randomize each student's preferences.
+        """
+        for s in self.students:
+            s.randomize_ratings(rng)
+
+    def break_all_partnerships(self):
+        """
+        Remove all partnerships from this pool.
+        """
+        for s in self.students:
+            s.break_partnership()
+
+    def make_stable_roommate_partnerships(self) -> bool:
+        """
+        Pair students up with Irving's stable roommates algorithm.
+
+        Returns True if a stable matching was found. Otherwise returns False
+            and leaves everyone unpartnered: there is no way to pair everyone
+            up without two students preferring each other to their partners.
+        """
+        self.break_all_partnerships()
+        partner = stable_roommates(pool_tables(self))
+        if partner is None:
+            return False
+        for i, j in enumerate(partner):
+            if i < j:
+                self.students[i].make_partnership(self.students[j])
+        return True
+
+    def get_unpartnered(self) -> list[Student]:
+        """
+        Returns a list of all students in the pool without a partner.
+        """
+        return [s for s in self.students if not s.has_partner()]
+
+    def print_partnership_quality(self):
+        """
+        Print how happy everyone is with their partner.
+        """
+        for s in self.students:
+            if s.partner and s.name < s.partner.name:
+                print(f"{s.name:10}({s.get_rating_of_current_partner()}) "
+                      f"{s.partner.name:10}({s.partner.get_rating_of_current_partner()})")
+        print("Unpartnered: " + ", ".join([str(s) for s in self.get_unpartnered()]))
+        print(f"  Total happiness = {calculate_average_happiness(self.students)}")
+
+
+def pool_tables(pool: Pool) -> PreferenceTables:
+    """
+    Returns the pool's preferences as PreferenceTables.
+
+    A pool is stored as two copies of the same group, so that the two-group
+    kernels (happiness, stability) work on it unchanged:
+        prefs_a[i] == prefs_b[i] is student i's list, MOST preferred first,
+        and ranks_a[i][j] == ranks_b[i][j] is student i's rating of student j.
+    """
+    names = [s.name for s in pool.students]
+    index = {name: i for i, name in enumerate(names)}
+    prefs = [[index[name] for name in reversed(s.partner_ratings)
+              if name in index and name != s.name]
+             for s in pool.students]
+    return PreferenceTables(prefs, prefs, names, names)
+
+
+def stable_roommates(tables: PreferenceTables) -> list[int] | None:
+    """
+    Run Irving's algorithm on a pool stored as in pool_tables().
+
+    Preference lists may be incomplete, so students are only paired with people
+    they rated, but everyone must end up with a partner.
+
+    Returns:
+        list[int] | None: partner[i] is the index of student i's partner,
+            or None if no stable matching pairs everyone up.
+    """
+    prefs = tables.prefs_a
+    n = len(prefs)
+    if n % 2:
+        return None
+
+    # position[x][y] is where y is on x's list (n if y is not on it at all)
+    position = [[n] * n for _ in range(n)]
+    for x, pref in enumerate(prefs):
+        for p, y in enumerate(pref):
+            position[x][y] = p
+
+    # Nothing is ever deleted from the middle of a list: every deletion cuts
+    #   the end off someone's list (and removes them from the lists they were cut from).
+    # So x and y are still on each other's lists exactly when both are within the cuts.
+    cut = [len(pref) - 1 for pref in prefs]
+
+    def present(x: int, y: int) -> bool:
+        return position[x][y] <= cut[x] and position[y][x] <= cut[y]
+
+    # Lists only shrink, so these pointers only move one way, costing O(n^2) in total
+    head = [0] * n
+    second = [1] * n
+    tail = [len(pref) - 1 for pref in prefs]
+
+    def first_of(x: int) -> int:
+        pref = prefs[x]
+        while head[x] <= cut[x] and not present(x, pref[head[x]]):
+            head[x] += 1
+        return pref[head[x]] if head[x] <= cut[x] else -1
+
+    def second_of(x: int) -> int:
+        pref = prefs[x]
+        second[x] = max(second[x], head[x] + 1)
+        while second[x] <= cut[x] and not present(x, pref[second[x]]):
+            second[x] += 1
+        return pref[second[x]] if second[x] <= cut[x] else -1
+
+    def last_of(x: int) -> int:
+        pref = prefs[x]
+        tail[x] = min(tail[x], cut[x])
+        while tail[x] >= head[x] and not present(x, pref[tail[x]]):
+            tail[x] -= 1
+        return pref[tail[x]] if tail[x] >= head[x] else -1
+
+    # Phase 1: proposals. holds[y] is the student whose proposal y is holding.
+    holds = [-1] * n
+    free = list(range(n - 1, -1, -1))
+    while free:
+        x = free.pop()
+        y = first_of(x)
+        if y < 0:
+            return None
+        # y prefers x to everyone still on their list after x, so cut them off
+        rejected = holds[y]
+        holds[y] = x
+        cut[y] = position[y][x]
+        if rejected >= 0:
+            free.append(rejected)
+
+    # Phase 2: remove rotations until everyone has exactly one person left.
+    # path is the walk x0, x1 = last(second(x0)), ... kept between rotations,
+    #   as in Irving's paper, so that the walks cost O(n^2) in total.
+    path = []
+    on_path = [-1] * n
+    start = 0
+    while True:
+        if not path:
+            while start < n and first_of(start) == last_of(start):
+                start += 1
+            if start == n:
+                break
+            path.append(start)
+            on_path[start] = 0
+
+        x = path[-1]
+        if first_of(x) == last_of(x):
+            # x's list shrank to one while removing a rotation; walk on from earlier
+            on_path[path.pop()] = -1
+            continue
+
+        y = last_of(second_of(x))
+        if on_path[y] < 0:
+            on_path[y] = len(path)
+            path.append(y)
+            continue
+
+        # Found the rotation path[on_path[y]:]; each x_i moves to their second choice
+        rotation = path[on_path[y]:]
+        del path[on_path[y]:]
+        seconds = [second_of(r) for r in rotation]
+        for r in rotation:
+            on_path[r] = -1
+        for r, s in zip(rotation, seconds):
+            cut[s] = position[s][r]
+        for r in rotation:
+            if first_of(r) < 0:
+                return None
+
+    partner = [first_of(x) for x in range(n)]
+    for x, y in enumerate(partner):
+        if y < 0 or partner[y] != x:
+            return None
+    return partner
+
+
+def roommate_blocking_pairs(tables: PreferenceTables, partner: list[int]) -> list[tuple[int, int]]:
+    """
+    Returns every blocking pair (i, j), with i < j, of a roommates matching.
+
+    Uses the same stability kernel as the two-group engines, which sees each
+    pair of the pool twice (once from each side).
+    """
+    blocking = get_kernel("stability", len(tables))(tables, partner)
+    return sorted((i, j) for i, j in blocking if i < j)
@@ -0,0 +1,333 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Gale-Shapley with group B split into shards that only talk by messages.
+
+For instances too big for one machine, each shard owns a slice of group B
+(their ratings of group A and who they are currently holding on to), and a
+coordinator owns group A. The match runs in rounds:
+    1. Every free A student proposes to their next choice. The coordinator
+       groups these proposals by the shard that owns each B student, and sends
+       each shard its batch.
+    2. Each shard compares the proposals with its students' current partners,
+       and replies with every A student who was turned down or dropped.
+    3. Those A students are free again in the next round.
+Deferred acceptance gives the same A-optimal matching whatever order proposals
+are made in, so the result, and even the set of proposals made, is the same
+as engines.gale_shapley_python().
+
+The coordinator only needs a Transport: something that can send a message to
+a shard and receive its reply. SocketTransport works over any connected
+sockets, so shards on other machines just run serve() on a TCP connection.
+LocalProcessTransport runs each shard in its own process, connected by a
+socketpair, to try it out on one machine; InProcessTransport skips processes
+altogether, which is handy for debugging.
+
+Messages are frames of 32-bit ints, prefixed with their length in bytes as a
+64-bit int (a shard's LOAD for a big instance can be well over 4 GiB):
+    LOAD:    [first B index, number of B students, size of group A, ranks rows...]
+    PROPOSE: [a, b, a, b, ...]
+    REJECTED (the reply to PROPOSE): [a, a, ...]
+    STOP:    []
+"""
+
+import array
+import multiprocessing
+import socket
+import struct
+
+from engines import PreferenceTables
+
+# Message types
+LOAD = 1
+PROPOSE = 2
+REJECTED = 3
+STOP = 4
+
+# Frame header: payload length in bytes, message type
+_FRAME = struct.Struct("<QB")
+_ITEM = array.array("i").itemsize
+
+
+class ShardServer:
+    """
+    The state of one shard: a contiguous slice of group B.
+
+    Attributes:
+        first (int): The index of the first B student in this shard.
+        ranks (list[list[int]]): ranks[k][a] is B student (first + k)'s rating
+            of A student a (-1 if unrated).
+        partner (list[int]): The A student each B student in this shard is holding on to, or -1.
+    """
+
+    def __init__(self):
+        """
+        Start an empty shard; a LOAD message fills it in.
+        """
+        self.first = 0
+        self.ranks = []
+        self.partner = []
+
+    def handle(self, kind: int, values: array.array) -> tuple[int, array.array] | None:
+        """
+        Handle one message. Returns the reply, or None if there is nothing to reply.
+        """
+        if kind == LOAD:
+            self.first, count, size_a = values[0], values[1], values[2]
+            self.ranks = [values[3 + k * size_a:3 + (k + 1) * size_a].tolist()
+                          for k in range(count)]
+            self.partner = [-1] * count
+            return None
+
+        if kind == PROPOSE:
+            ranks = self.ranks
+            partner = self.partner
+            first = self.first
+            rejected = array.array("i")
+            for p in range(0, len(values), 2):
+                a = values[p]
+                k = values[p + 1] - first
+                rank = ranks[k]
+                current = partner[k]
+                current_rank = rank[current] if current >= 0 else -1
+                if rank[a] > current_rank:
+                    if current >= 0:
+                        rejected.append(current)
+                    partner[k] = a
+                else:
+                    rejected.append(a)
+            return REJECTED, rejected
+
+        raise ValueError(f"Unknown message type {kind}")
+
+
+def send_frame(sock: socket.socket, kind: int, values: array.array):
+    """
+    Send one message over a socket.
+
+    The values are sent straight from the array, without copying them.
+    """
+    payload = memoryview(values).cast("B")
+    sock.sendall(_FRAME.pack(len(payload), kind))
+    sock.sendall(payload)
+
+
+def receive_frame(sock: socket.socket) -> tuple[int, array.array]:
+    """
+    Receive one message from a socket.
+    """
+    header = bytearray(_FRAME.size)
+    _receive_into(sock, memoryview(header))
+    size, kind = _FRAME.unpack(header)
+    # Received straight into the array, so a big LOAD is never held twice
+    values = array.array("i", [0]) * (size // _ITEM)
+    _receive_into(sock, memoryview(values).cast("B"))
+    return kind, values
+
+
+def _receive_into(sock: socket.socket, buffer: memoryview):
+    """
+    Fill the buffer from the socket.
+    """
+    received = 0
+    while received < len(buffer):
+        count = sock.recv_into(buffer[received:])
+        if not count:
+            raise ConnectionError("The connection closed in the middle of a message")
+        received += count
+
+
+def serve(sock: socket.socket):
+    """
+    Run a shard on a connected socket until told to STOP.
+
+    This is all a shard node needs to run, whether it is a local process or another machine.
+    """
+    shard = ShardServer()
+    with sock:
+        while True:
+            kind, values = receive_frame(sock)
+            if kind == STOP:
+                return
+            reply = shard.handle(kind, values)
+            if reply is not None:
+                send_frame(sock, *reply)
+
+
+class Transport:
+    """
+    How the coordinator talks to its shards.
+
+    Subclasses implement send() and receive(); a message is a type and an array of ints.
+
+    Attributes:
+        shard_count (int): The number of shards.
+    """
+
+    def __init__(self, shard_count: int):
+        self.shard_count = shard_count
+
+    def send(self, shard: int, kind: int, values: array.array):
+        """
+        Send a message to a shard.
+        """
+        raise NotImplementedError
+
+    def receive(self, shard: int) -> tuple[int, array.array]:
+        """
+        Wait for the next reply from a shard.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Shut every shard down.
+        """
+
+    def __enter__(self) -> 'Transport':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class InProcessTransport(Transport):
+    """
+    Shards that are plain objects in this process: no processes, no sockets.
+    """
+
+    def __init__(self, shard_count: int):
+        super().__init__(shard_count)
+        self.shards = [ShardServer() for _ in range(shard_count)]
+        self._replies = [[] for _ in range(shard_count)]
+
+    def send(self, shard: int, kind: int, values: array.array):
+        reply = self.shards[shard].handle(kind, values)
+        if reply is not None:
+            self._replies[shard].append(reply)
+
+    def receive(self, shard: int) -> tuple[int, array.array]:
+        return self._replies[shard].pop(0)
+
+
+class SocketTransport(Transport):
+    """
+    Shards at the other end of connected sockets, each running serve().
+    """
+
+    def __init__(self, sockets: list[socket.socket]):
+        super().__init__(len(sockets))
+        self.sockets = sockets
+
+    def send(self, shard: int, kind: int, values: array.array):
+        send_frame(self.sockets[shard], kind, values)
+
+    def receive(self, shard: int) -> tuple[int, array.array]:
+        return receive_frame(self.sockets[shard])
+
+    def close(self):
+        for sock in self.sockets:
+            try:
+                send_frame(sock, STOP, array.array("i"))
+            except OSError:
+                pass  # the shard has already gone
+            sock.close()
+
+
+class LocalProcessTransport(SocketTransport):
+    """
+    Each shard runs serve() in its own process, connected by a socketpair.
+    """
+
+    def __init__(self, shard_count: int):
+        sockets = []
+        self.processes = []
+        for _ in range(shard_count):
+            ours, theirs = socket.socketpair()
+            process = multiprocessing.Process(target=serve, args=(theirs,), daemon=True)
+            process.start()
+            theirs.close()
+            sockets.append(ours)
+            self.processes.append(process)
+        super().__init__(sockets)
+
+    def close(self):
+        super().close()
+        for process in self.processes:
+            process.join()
+
+
+def shard_starts(size_b: int, shard_count: int) -> list[int]:
+    """
+    Returns where each shard's slice of group B starts, plus size_b at the end.
+
+    The slices are contiguous and differ in size by at most one.
+    """
+    return [size_b * k // shard_count for k in range(shard_count + 1)]
+
+
+def sharded_gale_shapley(tables: PreferenceTables, transport: Transport) -> tuple[list[int], int]:
+    """
+    Run deferred acceptance with group A proposing, with group B spread over the transport's shards.
+
+    Each shard is first sent its slice of ranks_b. (On a real cluster the
+    shards could load their slices themselves; nothing else needs the full table.)
+
+    Returns:
+        (partner_a, proposals): as for engines.gale_shapley_python().
+    """
+    size_a = len(tables.prefs_a)
+    size_b = len(tables.prefs_b)
+    shard_count = transport.shard_count
+    starts = shard_starts(size_b, shard_count)
+
+    shard_of = [0] * size_b
+    for shard in range(shard_count):
+        rows = array.array("i", [starts[shard], starts[shard + 1] - starts[shard], size_a])
+        for b in range(starts[shard], starts[shard + 1]):
+            shard_of[b] = shard
+            rows.extend(tables.ranks_b[b])
+        transport.send(shard, LOAD, rows)
+
+    prefs_a = tables.prefs_a
+    partner_a = [-1] * size_a
+    next_choice = [0] * size_a
+    free = list(range(size_a))
+    proposals = 0
+
+    while free:
+        # Everyone free proposes to their next choice (tentatively accepted)
+        batches = [array.array("i") for _ in range(shard_count)]
+        for a in free:
+            k = next_choice[a]
+            if k < len(prefs_a[a]):
+                b = prefs_a[a][k]
+                next_choice[a] = k + 1
+                partner_a[a] = b
+                batches[shard_of[b]].extend((a, b))
+                proposals += 1
+
+        shards = [shard for shard in range(shard_count) if batches[shard]]
+        for shard in shards:
+            transport.send(shard, PROPOSE, batches[shard])
+
+        # Whoever was turned down or dropped is free again
+        free = []
+        for shard in shards:
+            kind, rejected = transport.receive(shard)
+            if kind != REJECTED:
+                raise ValueError(f"Expected a REJECTED reply from shard {shard}, got {kind}")
+            for a in rejected:
+                partner_a[a] = -1
+                free.append(a)
+
+    return partner_a, proposals
+
+
+def match_sharded(tables: PreferenceTables, shard_count: int = 4) -> tuple[list[int], int]:
+    """
+    Run sharded_gale_shapley() with each shard in its own local process.
+    """
+    with LocalProcessTransport(shard_count) as transport:
+        return sharded_gale_shapley(tables, transport)
@@ -0,0 +1,110 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for the maximum-welfare assignment baseline
+"""
+
+from gale_shapley import calculate_average_happiness
+from test_engines import make_test_group, random_tables
+import assignment
+import engines
+import itertools
+import math
+import random
+
+
+def test_hungarian():
+    """
+    The Hungarian algorithm should find the cheapest assignment (checked by brute force)
+    """
+    rng = random.Random(4)
+    for n in range(1, 7):
+        for _ in range(20):
+            cost = [[rng.randrange(-10, 4) for _ in range(n)] for _ in range(n)]
+            expected = min(sum(cost[i][p[i]] for i in range(n))
+                           for p in itertools.permutations(range(n)))
+
+            result = assignment.hungarian(cost)
+            assert list(range(n)) == sorted(result), f'Not an assignment: {result}'
+            total = sum(cost[i][result[i]] for i in range(n))
+            assert expected == total, f'Expected cost {expected}, got {total} for {cost}'
+
+    print("tests for hungarian passed")
+
+
+def test_backends_agree():
+    """
+    Every assignment backend should reach the same (maximum) welfare
+    """
+    for n in [3, 30, 160]:
+        tables = random_tables(n)
+        welfare = []
+        for backend in engines.available_backends("assignment"):
+            partner_a = engines.get_kernel("assignment", backend=backend)(tables)
+            assert list(range(n)) == sorted(partner_a), f'{backend}: not a matching'
+            welfare.append(sum(tables.ranks_a[i][j] + tables.ranks_b[j][i]
+                               for i, j in enumerate(partner_a)))
+        for result in welfare:
+            assert welfare[0] == result, f'Backends disagree on welfare: {welfare}'
+
+        # No matching, stable or not, can beat it
+        partner_a, _ = engines.gale_shapley_python(tables)
+        gale_shapley_welfare = sum(tables.ranks_a[i][j] + tables.ranks_b[j][i]
+                                   for i, j in enumerate(partner_a))
+        assert gale_shapley_welfare <= welfare[0], 'Gale-Shapley beat the maximum welfare'
+
+    print("tests for assignment backends passed")
+
+
+def test_make_max_welfare_partnerships():
+    """
+    Test cases for Group.make_max_welfare_partnerships
+    """
+    group = make_test_group()
+    group.make_gale_shapely_partnerships()
+    gale_shapley_happiness = calculate_average_happiness(group.all_students)
+
+    group.make_max_welfare_partnerships()
+    for s in group.all_students:
+        assert s.has_partner(), f'{s.name} was left without a partner'
+    result = calculate_average_happiness(group.all_students)
+    assert result >= gale_shapley_happiness, \
+        f'Expected at least {gale_shapley_happiness}, got {result}'
+
+    # Check the happiness against a brute force search over every matching
+    tables = engines.tables_from_group(group)
+    best = max(sum(tables.ranks_a[i][p[i]] + tables.ranks_b[p[i]][i] for i in range(5))
+               for p in itertools.permutations(range(5)))
+    expected = best / (10 * 4)
+    assert math.isclose(expected, result), f'Expected {expected}, got {result}'
+
+    print("tests for make_max_welfare_partnerships passed")
+
+
+def test_compare_with_gale_shapley():
+    """
+    Gale-Shapley should be stable, and maximum welfare should be the happiest
+    """
+    result = assignment.compare_with_gale_shapley(student_count=20, run_count=5, seed=1)
+    gale_shapley = result["make_gale_shapely_partnerships"]
+    max_welfare = result["make_max_welfare_partnerships"]
+    naive = result["make_naive_partnerships"]
+
+    assert 0 == gale_shapley["blocking_pairs"], 'Gale-Shapley matchings should be stable'
+    assert max_welfare["all"] >= gale_shapley["all"] >= naive["all"], \
+        f'Expected max welfare >= Gale-Shapley >= naive, got {result}'
+
+    print("tests for compare_with_gale_shapley passed")
+
+
+def test_all():
+    test_hungarian()
+    test_backends_agree()
+    test_make_max_welfare_partnerships()
+    test_compare_with_gale_shapley()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
@@ -0,0 +1,141 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for the benchmarks
+"""
+
+import benchmark
+import math
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def test_startup_budget():
+    """
+    Importing gale_shapley and running a 10x10 match must stay fast and must not import NumPy
+    """
+    result = benchmark.measure_startup(size=10, repeats=3)
+
+    assert not result["numpy_imported"], "NumPy should only be imported for large instances"
+    assert result["time"] < benchmark.STARTUP_BUDGET_MS, \
+        f'Import + 10x10 match took {result["time"]:.1f} ms, budget is {benchmark.STARTUP_BUDGET_MS} ms'
+
+    print("tests for startup budget passed")
+
+
+def test_submodules_are_lazy():
+    """
+    The heavier submodules should only be imported when first used
+    """
+    code = (
+        "import sys, gale_shapley\n"
+        "lazy = ['engines', 'metrics', 'matching_io', 'benchmark', 'lazy_random', 'proposal_trace', 'checkpoint', 'sharded', 'manipulation', 'numpy']\n"
+        "assert not [m for m in lazy if m in sys.modules], 'imported too early'\n"
+        "assert gale_shapley.io.__name__ == 'matching_io'\n"
+        "assert gale_shapley.engines.__name__ == 'engines'\n"
+        "assert 'numpy' not in sys.modules, 'numpy was imported'\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    print("tests for lazy submodules passed")
+
+
+def test_workspace_allocations():
+    """
+    A Workspace run should allocate the same small amount of memory whatever the group size
+    """
+    small = benchmark.measure_run_allocations(20, use_workspace=True)
+    large = benchmark.measure_run_allocations(200, use_workspace=True)
+    assert large < 1024, f'A 200x200 Workspace run allocated {large} bytes'
+    assert large <= small + 128, f'Allocations grew with size: {small} bytes -> {large} bytes'
+
+    # ...whereas a Group run allocates more as the group gets bigger
+    group_small = benchmark.measure_run_allocations(20, use_workspace=False)
+    group_large = benchmark.measure_run_allocations(80, use_workspace=False)
+    assert group_large > group_small, f'Expected Group allocations to grow, got {group_small} -> {group_large}'
+
+    print("tests for workspace allocations passed")
+
+
+def test_fit_exponent():
+    """
+    Test cases for fit_exponent
+    """
+    sizes = [10, 20, 40, 80]
+
+    expected = 2
+    result = benchmark.fit_exponent(sizes, [3 * n ** 2 for n in sizes])
+    assert math.isclose(expected, result), f'Expected {expected}, got {result}'
+
+    expected = 1
+    result = benchmark.fit_exponent(sizes, [n * 0.5 for n in sizes])
+    assert math.isclose(expected, result), f'Expected {expected}, got {result}'
+
+    # Not enough usable points
+    result = benchmark.fit_exponent([10, 20], [5, 0])
+    assert math.isnan(result), f'Expected nan, got {result}'
+
+    print("tests for fit_exponent passed")
+
+
+def test_scaling_report():
+    """
+    A small sweep should measure every algorithm and write both kinds of report
+    """
+    results = benchmark.scaling_sweep(sizes=[8, 16, 32], runs=2)
+
+    assert "Group.make_gale_shapely_partnerships" in results, 'Missing the Group algorithm'
+    for name, rows in results.items():
+        assert [8, 16, 32] == rows["sizes"], f'{name}: wrong sizes {rows["sizes"]}'
+        for proposals, size in zip(rows["proposals"], rows["sizes"]):
+            assert size <= proposals <= size * size, f'{name}: impossible proposal count {proposals}'
+
+    with tempfile.TemporaryDirectory() as folder:
+        html_path = os.path.join(folder, 'scaling.html')
+        benchmark.write_report(results, html_path)
+        with open(html_path) as f:
+            text = f.read()
+        assert text.count('<svg') == 3, 'Expected three inline plots'
+        assert 'Fitted exponents' in text, 'Expected the fitted exponents table'
+
+        md_path = os.path.join(folder, 'scaling.md')
+        benchmark.write_report(results, md_path)
+        for metric in ["time", "proposals", "memory"]:
+            assert os.path.exists(os.path.join(folder, f'scaling-{metric}.svg')), f'Missing {metric} plot'
+
+    print("tests for scaling report passed")
+
+
+def test_hard_scaling():
+    """
+    On worst-case instances every algorithm makes n^2 - n + 1 proposals, and takes about n^2 time
+    """
+    algorithms = ["Group.make_gale_shapely_partnerships", "Workspace.match"]
+    results = benchmark.scaling_sweep(sizes=[50, 100, 200], runs=3, algorithms=algorithms,
+                                      preferences="worst_case")
+    for name, rows in results.items():
+        expected = [n * n - n + 1 for n in rows["sizes"]]
+        assert expected == rows["proposals"], f'{name}: expected {expected}, got {rows["proposals"]}'
+        # Quadratic is 2; searching group A every round would make it 3
+        k = benchmark.fit_exponent(rows["sizes"], rows["time"])
+        assert k < 2.6, f'{name}: time grows like n^{k:.2f} on worst-case instances'
+
+    print("tests for hard scaling passed")
+
+
+def test_all():
+    test_startup_budget()
+    test_submodules_are_lazy()
+    test_workspace_allocations()
+    test_fit_exponent()
+    test_scaling_report()
+    test_hard_scaling()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
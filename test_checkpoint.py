@@ -0,0 +1,131 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for checkpointing and resuming matches
+"""
+
+from test_engines import random_tables
+import checkpoint
+import engines
+import os
+import random
+import tempfile
+
+
+def test_uninterrupted():
+    """
+    A checkpointed run should give the same result as the plain engine
+    """
+    random.seed(6)
+    tables = random_tables(80)
+    expected = engines.gale_shapley_python(tables)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'match.ckpt')
+        result = checkpoint.gale_shapley_checkpointed(tables, path, every=10)
+        assert expected == result, f'Expected {expected}, got {result}'
+
+        # Running again just reads back the finished state
+        result = checkpoint.gale_shapley_checkpointed(tables, path, every=10)
+        assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for uninterrupted passed")
+
+
+def test_resume():
+    """
+    Resuming from a checkpoint part-way through should give exactly the same result
+    """
+    random.seed(7)
+    tables = random_tables(80)
+    expected = engines.gale_shapley_python(tables)
+
+    for stop_after in [1, 50, 200]:
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'match.ckpt')
+
+            # Pretend a worker got this far, saved a checkpoint and was killed
+            partner_a = [-1] * 80
+            partner_b = [-1] * 80
+            next_choice = [0] * 80
+            free = list(range(79, -1, -1))
+            proposals = engines.propose_until_done(tables, partner_a, partner_b, next_choice,
+                                                   free, limit=stop_after)
+            with checkpoint.Checkpoint(path, 80, 80, checkpoint.fingerprint(tables)) as saved:
+                saved.save(partner_a, partner_b, next_choice, free, proposals)
+
+            result = checkpoint.gale_shapley_checkpointed(tables, path)
+            assert expected == result, f'Expected {expected}, got {result} after {stop_after}'
+
+    print("tests for resume passed")
+
+
+def test_torn_checkpoint():
+    """
+    If the latest checkpoint is damaged, the previous one should be used instead
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'match.ckpt')
+        with checkpoint.Checkpoint(path, 3, 3) as saved:
+            assert saved.load() is None, 'Expected no checkpoint in a new file'
+            saved.save([0, -1, -1], [0, -1, -1], [1, 0, 0], [2, 1], 1)
+            saved.save([0, 1, -1], [0, 1, -1], [1, 1, 0], [2], 2)
+            damaged = saved._slot_offset(saved.sequence) + 30
+
+        # Damage the second checkpoint, as if the process died while saving it
+        with open(path, 'r+b') as f:
+            f.seek(damaged)
+            f.write(b'\xff')
+
+        with checkpoint.Checkpoint(path, 3, 3) as saved:
+            expected = ([0, -1, -1], [0, -1, -1], [1, 0, 0], [2, 1], 1)
+            result = saved.load()
+            assert expected == result, f'Expected {expected}, got {result}'
+
+        try:
+            checkpoint.Checkpoint(path, 4, 4)
+            assert False, 'Expected a ValueError for the wrong group sizes'
+        except ValueError:
+            pass
+
+    print("tests for torn checkpoint passed")
+
+
+def test_other_preferences():
+    """
+    A checkpoint for one instance should never be resumed with another of the same size
+    """
+    random.seed(7)
+    first = random_tables(50)
+    second = random_tables(50)
+    assert checkpoint.fingerprint(first) != checkpoint.fingerprint(second), 'Expected different fingerprints'
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'match.ckpt')
+        checkpoint.gale_shapley_checkpointed(first, path)
+        try:
+            checkpoint.gale_shapley_checkpointed(second, path)
+            assert False, 'Expected a ValueError for different preferences'
+        except ValueError:
+            pass
+
+        # Once the old checkpoint is gone, the second instance gets its own answer
+        os.remove(path)
+        expected = engines.gale_shapley_python(second)
+        result = checkpoint.gale_shapley_checkpointed(second, path)
+        assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for other preferences passed")
+
+
+def test_all():
+    test_uninterrupted()
+    test_resume()
+    test_torn_checkpoint()
+    test_other_preferences()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
@@ -0,0 +1,356 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for the kernel registry and the fast engines
+"""
+
+from gale_shapley import Group, calculate_average_happiness
+import engines
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+
+
+def make_test_group():
+    """
+    Returns the hand-written 5x5 Group used in test_gale_shapley.py
+    """
+    student_names_a = ['Ana', 'Avery', 'Alastair', 'Amelia', 'Abby']
+    student_names_b = ['Bailey', 'Brian', 'Beverly', 'Bob', 'Biyu']
+    student_group = Group(student_names_a, student_names_b)
+    student_group.set_ratings(
+        {
+            'Ana': ['Bob', 'Brian', 'Bailey', 'Beverly', 'Biyu'],
+            'Amelia': ['Bailey', 'Brian', 'Beverly', 'Bob', 'Biyu'],
+            'Avery': ['Bailey', 'Biyu', 'Beverly', 'Bob', 'Brian'],
+            'Abby': ['Bob', 'Bailey', 'Beverly', 'Biyu', 'Brian'],
+            'Alastair': ['Biyu', 'Bob', 'Beverly', 'Bailey', 'Brian'],
+            'Biyu': ['Amelia', 'Abby', 'Avery', 'Ana', 'Alastair'],
+            'Bailey': ['Ana', 'Avery', 'Alastair', 'Amelia', 'Abby'],
+            'Beverly': ['Avery', 'Alastair', 'Amelia', 'Abby', 'Ana'],
+            'Bob': ['Amelia', 'Alastair', 'Abby', 'Ana', 'Avery'],
+            'Brian': ['Avery', 'Ana', 'Amelia', 'Abby', 'Alastair'],
+        }
+    )
+    return student_group
+
+
+def random_tables(n: int) -> engines.PreferenceTables:
+    """
+    Returns PreferenceTables with n students per group and random complete preferences
+    """
+    prefs_a = [random.sample(range(n), n) for _ in range(n)]
+    prefs_b = [random.sample(range(n), n) for _ in range(n)]
+    return engines.PreferenceTables(prefs_a, prefs_b)
+
+
+def test_tables_from_group():
+    """
+    Test cases for tables_from_group
+    """
+    group = make_test_group()
+    tables = engines.tables_from_group(group)
+
+    # Ratings should match the Student methods exactly
+    for i, a in enumerate(group.students_a):
+        for j, b in enumerate(group.students_b):
+            expected = a.get_rating_of_name(b.name)
+            result = tables.ranks_a[i][j]
+            assert expected == result, f'Expected {expected}, got {result}'
+
+            expected = b.get_rating_of_name(a.name)
+            result = tables.ranks_b[j][i]
+            assert expected == result, f'Expected {expected}, got {result}'
+
+    # Proposal order is most preferred first
+    expected = ['Biyu', 'Beverly', 'Bailey', 'Brian', 'Bob']
+    result = [tables.names_b[j] for j in tables.prefs_a[0]]
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for tables_from_group passed")
+
+
+def test_match_agrees_with_group():
+    """
+    Every match backend should give the same partners as make_gale_shapely_partnerships
+    """
+    group = make_test_group()
+    group.make_gale_shapely_partnerships()
+    expected = [s.partner.name for s in group.students_a]
+
+    tables = engines.tables_from_group(group)
+    for backend in engines.available_backends("match"):
+        partner_a, proposals = engines.get_kernel("match", backend=backend)(tables)
+        result = [tables.names_b[j] for j in partner_a]
+        assert expected == result, f'{backend}: expected {expected}, got {result}'
+        assert 5 <= proposals <= 25, f'{backend}: impossible proposal count {proposals}'
+
+    # match_group should make the partnerships on the Group itself
+    group.break_all_partnerships()
+    engines.match_group(group)
+    result = [s.partner.name for s in group.students_a]
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    expected = 0.75
+    result = calculate_average_happiness(group.all_students)
+    assert math.isclose(expected, result), f'Expected {expected}, got {result}'
+
+    print("tests for match kernels passed")
+
+
+def test_backends_agree_on_random_instances():
+    """
+    All backends of every kernel should agree on random instances
+    """
+    for n in [1, 2, 7, 80, 300]:
+        tables = random_tables(n)
+        results = [engines.get_kernel("match", backend=b)(tables)
+                   for b in engines.available_backends("match")]
+        for result in results:
+            assert results[0] == result, f'Backends disagree for n={n}'
+
+        partner_a = results[0][0]
+        for backend in engines.available_backends("stability"):
+            result = engines.get_kernel("stability", backend=backend)(tables, partner_a)
+            assert [] == result, f'{backend}: Gale-Shapley matching has blocking pairs {result}'
+
+        if n > 1:
+            results = [engines.get_kernel("happiness", backend=b)(tables, partner_a)
+                       for b in engines.available_backends("happiness")]
+            for result in results:
+                for key in ["a", "b", "all"]:
+                    assert math.isclose(results[0][key], result[key]), f'Happiness disagrees for n={n}'
+
+    print("tests for backend agreement passed")
+
+
+def test_happiness_and_stability():
+    """
+    Test the metric kernels against the Student-based versions
+    """
+    group = make_test_group()
+    group.make_naive_partnerships()
+    tables = engines.tables_from_group(group)
+    partner_a = list(range(5))
+
+    for backend in engines.available_backends("happiness"):
+        result = engines.get_kernel("happiness", backend=backend)(tables, partner_a)
+        expected = calculate_average_happiness(group.students_a)
+        assert math.isclose(expected, result["a"]), f'Expected {expected}, got {result["a"]}'
+        expected = calculate_average_happiness(group.students_b)
+        assert math.isclose(expected, result["b"]), f'Expected {expected}, got {result["b"]}'
+        expected = calculate_average_happiness(group.all_students)
+        assert math.isclose(expected, result["all"]), f'Expected {expected}, got {result["all"]}'
+
+    # With groups of different sizes, each group is scaled by its own number of options
+    #   A0 gets their favourite (2 of 2), A1 their least favourite (0 of 2)
+    #   B0 gets their favourite (1 of 1), B1 is unpartnered (-1), B2 their least favourite (0 of 1)
+    uneven = engines.PreferenceTables([[0, 1, 2], [1, 0, 2]], [[0, 1], [0, 1], [0, 1]])
+    expected = {"a": 2 / 4, "b": 0 / 3, "all": (2 / 2 + 0 / 1) / 5}
+    for backend in engines.available_backends("happiness"):
+        result = engines.get_kernel("happiness", backend=backend)(uneven, [0, 2])
+        for key in expected:
+            assert math.isclose(expected[key], result[key]), f'{backend}: expected {expected[key]}, got {result[key]} for {key}'
+
+    # The naive matching is not stable: check every reported pair really blocks it
+    for backend in engines.available_backends("stability"):
+        result = engines.get_kernel("stability", backend=backend)(tables, partner_a)
+        assert result, f'{backend}: expected blocking pairs for the naive matching'
+        for i, j in result:
+            a, b = group.students_a[i], group.students_b[j]
+            assert a.get_rating_of_name(b.name) > a.get_rating_of_current_partner()
+            assert b.get_rating_of_name(a.name) > b.get_rating_of_current_partner()
+
+    print("tests for happiness and stability passed")
+
+
+def test_incomplete_lists():
+    """
+    Proposers that run out of choices stay unpartnered, and unrated proposers are rejected
+    """
+    # A0 only rates B0, A1 rates nobody, A2 rates B0 then B1
+    # B0 only rates A2, B1 rates A2 and A0
+    tables = engines.PreferenceTables([[0], [], [0, 1]], [[2], [2, 0], []])
+
+    for backend in engines.available_backends("match"):
+        partner_a, _ = engines.get_kernel("match", backend=backend)(tables)
+        expected = [-1, -1, 0]
+        assert expected == partner_a, f'{backend}: expected {expected}, got {partner_a}'
+
+        result = engines.get_kernel("stability", backend=backend)(tables, partner_a)
+        assert [] == result, f'{backend}: expected no blocking pairs, got {result}'
+
+    # Big enough for the NumPy kernel to run vectorized rounds, with lists cut short,
+    #   and with more students in one group than the other
+    import instances
+    rng = random.Random(3)
+    big = instances.random_instance(300, rng, keep=0.3)
+    unbalanced = engines.PreferenceTables([rng.sample(range(90), rng.randint(0, 90)) for _ in range(200)],
+                                          [rng.sample(range(200), rng.randint(0, 200)) for _ in range(90)])
+    for instance in [tables, big, unbalanced]:
+        expected = engines.gale_shapley_python(instance)
+        for backend in engines.available_backends("match"):
+            result = engines.get_kernel("match", backend=backend)(instance)
+            assert expected == result, f'{backend}: expected {expected}, got {result}'
+        if engines.HAS_NUMPY:
+            import numpy_engines
+
+            # Every round vectorized, down to the last proposer
+            result = numpy_engines.gale_shapley_numpy(instance, sequential_tail=1)
+            assert expected == result, f'vectorized: expected {expected}, got {result}'
+
+    print("tests for incomplete lists passed")
+
+
+def test_kernel_selection():
+    """
+    Test cases for select_backend and get_kernel
+    """
+    # Small instances always run in pure Python
+    for name in ["match", "happiness", "stability"]:
+        expected = "python"
+        result = engines.select_backend(name, 10)
+        assert expected == result, f'Expected {expected}, got {result}'
+
+    # Stability is never checked with NumPy unless asked for
+    expected = "python"
+    result = engines.select_backend("stability", 10 ** 6)
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    # Without NumPy, even huge instances fall back to pure Python
+    has_numpy = engines.HAS_NUMPY
+    engines.HAS_NUMPY = False
+    try:
+        expected = ["python"]
+        result = engines.available_backends("match")
+        assert expected == result, f'Expected {expected}, got {result}'
+
+        expected = "python"
+        result = engines.select_backend("match", 10 ** 6)
+        assert expected == result, f'Expected {expected}, got {result}'
+
+        try:
+            engines.get_kernel("match", backend="numpy")
+            assert False, "Asking for a missing backend should raise LookupError"
+        except LookupError:
+            pass
+    finally:
+        engines.HAS_NUMPY = has_numpy
+
+    try:
+        engines.get_kernel("no-such-kernel")
+        assert False, "Asking for an unknown kernel should raise KeyError"
+    except KeyError:
+        pass
+
+    print("tests for kernel selection passed")
+
+
+def test_selected_backend_is_fastest():
+    """
+    Test that at each backend's minimum size, the automatic choice is not slower than pure Python
+
+    Fresh instances are used, so that building NumPy arrays is part of the cost.
+    """
+    import instances
+
+    def best_time(name, backend, size):
+        times = []
+        for seed in range(3):
+            tables = instances.random_instance(size, random.Random(seed))
+            args = (tables,) if name in ("match", "assignment") else (
+                tables, engines.gale_shapley_python(tables)[0])
+            kernel = engines.get_kernel(name, size, backend)
+            start = time.perf_counter()
+            kernel(*args)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    checked = 0
+    for name in ["match", "happiness", "stability", "assignment"]:
+        for backend in engines.available_backends(name):
+            size = engines._KERNELS[name][backend][2]
+            if backend == "python" or size == math.inf:
+                continue
+            selected = engines.select_backend(name, size)
+            auto = best_time(name, None, size)
+            python = best_time(name, "python", size)
+            # Allow for timing noise on a shared machine
+            assert auto <= python * 1.25, \
+                f'{name} picked {selected} at size {size}: {auto * 1000:.1f} ms against {python * 1000:.1f} ms in Python'
+            checked += 1
+
+    print(f"tests for automatic backend speed passed ({checked} thresholds checked)")
+
+
+def test_numpy_is_imported_lazily():
+    """
+    Importing the engines, or running a small match, must not import NumPy
+    """
+    code = (
+        "import sys, gale_shapley, engines, metrics\n"
+        "g = gale_shapley.Group(['A0', 'A1'], ['B0', 'B1'])\n"
+        "engines.match_group(g)\n"
+        "assert 'numpy' not in sys.modules, 'numpy was imported'\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    print("tests for lazy importing passed")
+
+
+def test_workspace():
+    """
+    A Workspace should match and score exactly like the other engines
+    """
+    workspace = engines.Workspace(30)
+    rng = random.Random(7)
+    for _ in range(5):
+        workspace.randomize(rng)
+        proposals = workspace.match()
+        tables = workspace.to_tables()
+
+        expected_partners, expected_proposals = engines.gale_shapley_python(tables)
+        assert expected_partners == workspace.partner_a, 'Workspace partners differ from gale_shapley_python'
+        assert expected_proposals == proposals, f'Expected {expected_proposals} proposals, got {proposals}'
+
+        expected = engines.get_kernel("happiness")(tables, workspace.partner_a)
+        result = workspace.happiness()
+        for key, value in zip(["a", "b", "all"], result):
+            assert math.isclose(expected[key], value), f'Expected {expected[key]}, got {value} for {key}'
+
+        workspace.match_naive()
+        expected = engines.get_kernel("happiness")(tables, list(range(30)))
+        result = workspace.happiness()
+        for key, value in zip(["a", "b", "all"], result):
+            assert math.isclose(expected[key], value), f'Expected {expected[key]}, got {value} for {key}'
+
+    # Randomizing with the same seed gives the same preferences, whatever came before
+    workspace.randomize(random.Random(1))
+    expected = [row[:] for row in workspace.prefs_a]
+    workspace.randomize(random.Random(2))
+    workspace.randomize(random.Random(1))
+    assert expected == workspace.prefs_a, 'Randomizing should not depend on the previous preferences'
+
+    print("tests for workspace passed")
+
+
+def test_all():
+    test_tables_from_group()
+    test_match_agrees_with_group()
+    test_backends_agree_on_random_instances()
+    test_happiness_and_stability()
+    test_incomplete_lists()
+    test_kernel_selection()
+    test_selected_backend_is_fastest()
+    test_numpy_is_imported_lazily()
+    test_workspace()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
@@ -6,7 +6,11 @@ Test cases for the Gale-Shapely experimental setup
 """
 
 from gale_shapley import Student, Group, calculate_average_happiness
+from gale_shapley import run_experiment, run_seeded, replay_run
+from gale_shapley import ProgressMonitor, MatchCancelled, run_benchmark
 import math
+import threading
+import time
 
 # Part 1
 # -------------------------------------------------------------
@@ -449,9 +453,260 @@ def test_algorithm():
         "Gale Shapley algorithm should've made partnerships so that the average happiness is 0.75\n" +\
         f'Instead got {result} -- double-check your previous tests'
 
+    # Check that we counted the proposals (worked out by hand)
+    expected = 12
+    result = student_group.proposal_count
+    assert expected == result, f'Expected {expected} proposals, got {result}'
+
+    # Ratings should still be looked up correctly after the algorithm has finished
+    bob = student_group.get_student_by_name('Bob')
+    bob.partner_ratings = ['Avery', 'Ana', 'Abby', 'Alastair', 'Amelia']
+    expected = 0
+    result = bob.get_rating_of_name('Avery')
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    # Students with nobody to propose to make no proposals
+    empty_group = Group(['Ana', 'Avery'], ['Bailey', 'Brian'])
+    empty_group.set_ratings({'Ana': [], 'Avery': []})
+    empty_group.make_gale_shapely_partnerships()
+    expected = 0
+    result = empty_group.proposal_count
+    assert expected == result, f'Expected {expected} proposals, got {result}'
+
     print("tests for entire algorithm passed")
 
 
+# Part 4
+# -------------------------------------------------------------
+
+def test_seeded_experiment():
+    """
+    Test cases for reproducible experiments with seed=
+    """
+    # The same seed gives exactly the same results
+    first = run_experiment(student_count=12, run_count=6, seed=2025)
+    second = run_experiment(student_count=12, run_count=6, seed=2025)
+    for key in ["a", "b", "all", "unfairness"]:
+        assert first[key] == second[key], f'Expected {first[key]}, got {second[key]} for {key}'
+
+    # A different seed gives different results
+    other = run_experiment(student_count=12, run_count=6, seed=2026)
+    assert first["all"] != other["all"], 'Different seeds should give different ratings'
+
+    # Splitting the runs across processes gives bit-for-bit identical results
+    parallel = run_experiment(student_count=12, run_count=6, seed=2025, processes=2)
+    for key in ["a", "b", "all", "unfairness"]:
+        assert first[key] == parallel[key], f'Expected {first[key]}, got {parallel[key]} for {key}'
+
+    # Any single run can be recomputed on its own
+    all_runs = run_seeded(12, "make_gale_shapely_partnerships", 2025, range(6))
+    group = replay_run(12, 2025, 4)
+    expected = all_runs[4]
+    result = (calculate_average_happiness(group.students_a),
+              calculate_average_happiness(group.students_b),
+              calculate_average_happiness(group.all_students))
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    # The same holds for the faster engines
+    for engine in ["workspace", "lazy"]:
+        serial = run_experiment(student_count=12, run_count=6, seed=2025, engine=engine)
+        parallel = run_experiment(student_count=12, run_count=6, seed=2025, engine=engine,
+                                  processes=2)
+        for key in ["a", "b", "all", "unfairness"]:
+            assert serial[key] == parallel[key], f'{engine}: expected {serial[key]}, got {parallel[key]} for {key}'
+
+    print("tests for seeded experiments passed")
+
+
+# Part 5
+# -------------------------------------------------------------
+
+def test_progress_monitor():
+    """
+    Test cases for progress callbacks, cancellation and time budgets
+    """
+    # A match reports every round but the last (interval=0), then its final state
+    reports = []
+    g = Group([f"A{i}" for i in range(30)], [f"B{i}" for i in range(30)])
+    g.randomize_ratings()
+    g.make_gale_shapely_partnerships(monitor=ProgressMonitor(reports.append, interval=0))
+    assert reports, 'Expected some progress reports'
+    expected = {"round": len(reports), "free": 0, "proposals": g.proposal_count}
+    result = {key: reports[-1][key] for key in expected}
+    assert expected == result, f'Expected {expected}, got {result}'
+    for before, after in zip(reports, reports[1:]):
+        assert before["proposals"] <= after["proposals"], f'Proposals went down: {before}, {after}'
+    assert [] == g.get_unpartnered(), 'Expected everyone to be partnered'
+
+    # Monitoring doesn't change the matching
+    partners = [s.partner.name for s in g.students_a]
+    g.make_gale_shapely_partnerships()
+    result = [s.partner.name for s in g.students_a]
+    assert partners == result, f'Expected {partners}, got {result}'
+
+    # A cancelled match stops after its first round
+    cancel = threading.Event()
+    cancel.set()
+    try:
+        g.make_gale_shapely_partnerships(monitor=ProgressMonitor(cancel=cancel))
+        assert False, 'Expected MatchCancelled'
+    except MatchCancelled as e:
+        assert 1 == e.progress["round"], f'Expected to stop after round 1, got {e.progress}'
+
+    # An experiment reports its runs (and the rounds of each run's match),
+    #   and its results don't change
+    reports = []
+    expected = run_experiment(student_count=10, run_count=5, seed=7)
+    result = run_experiment(student_count=10, run_count=5, seed=7,
+                            monitor=ProgressMonitor(reports.append, interval=0))
+    assert expected["all"] == result["all"], f'Expected {expected["all"]}, got {result["all"]}'
+    expected = [0, 1, 2, 3, 4, 5]
+    result = list(dict.fromkeys(report.get("runs_done", 0) for report in reports))
+    assert expected == result, f'Expected {expected}, got {result}'
+    assert "round" in reports[0], f'Expected the first run to report its rounds, got {reports[0]}'
+
+    # Finishing the last run never raises, however little time was left
+    expected = run_experiment(student_count=10, run_count=1, seed=7,
+                              matchmaking_fxn="make_naive_partnerships")
+    result = run_experiment(student_count=10, run_count=1, seed=7,
+                            matchmaking_fxn="make_naive_partnerships",
+                            monitor=ProgressMonitor(time_budget=0))
+    assert expected["all"] == result["all"], f'Expected {expected["all"]}, got {result["all"]}'
+
+    # Running over the time budget stops an experiment, seeded or not, serial or parallel
+    for seed, processes in [(None, 1), (7, 1), (7, 2)]:
+        try:
+            run_experiment(student_count=10, run_count=50, seed=seed, processes=processes,
+                           monitor=ProgressMonitor(time_budget=0))
+            assert False, f'Expected MatchCancelled with seed={seed}, processes={processes}'
+        except MatchCancelled as e:
+            assert e.progress.get("runs_done", 0) < 50, f'Expected to stop early, got {e.progress}'
+
+    # The time budget stops a single long run part of the way through, with every engine
+    for engine in ["group", "workspace", "lazy"]:
+        preferences = "random" if engine == "lazy" else "worst_case"
+        size = 3000 if engine == "lazy" else 200
+        try:
+            run_experiment(student_count=size, run_count=1, seed=7, engine=engine,
+                           preferences=preferences, monitor=ProgressMonitor(time_budget=0))
+            assert False, f'{engine}: expected MatchCancelled'
+        except MatchCancelled as e:
+            assert "runs_done" not in e.progress, f'{engine}: expected to stop during the run, got {e.progress}'
+            assert e.progress["proposals"] > 0, f'{engine}: expected to stop during the run, got {e.progress}'
+
+    # So does cancelling it, even in a worker process
+    cancel = threading.Event()
+    cancel.set()
+    start = time.perf_counter()
+    try:
+        run_experiment(student_count=600, run_count=2, seed=7, processes=2,
+                       preferences="worst_case", monitor=ProgressMonitor(cancel=cancel))
+        assert False, 'Expected MatchCancelled'
+    except MatchCancelled:
+        pass
+    elapsed = time.perf_counter() - start
+    full_run = run_experiment(student_count=600, run_count=1, seed=7,
+                              preferences="worst_case")["time"] / 1000
+    assert elapsed < 2 * full_run, f'Cancelling took {elapsed:.2f}s, but both runs only take {2 * full_run:.2f}s'
+
+    print("tests for progress monitor passed")
+
+
+def test_hard_preferences():
+    """
+    Test cases for experiments on hard instances, with preferences=
+    """
+    # Every run of a worst-case experiment makes the most proposals possible
+    for run_index in range(3):
+        group = replay_run(9, 2025, run_index, preferences="worst_case")
+        expected = 9 * 9 - 9 + 1
+        assert expected == group.proposal_count, f'Expected {expected} proposals, got {group.proposal_count}'
+
+    # A worst-case Group match takes about n^2 rounds, so each round must only look at
+    #   the few students it changed, not all of group A (which would take n^3 time)
+    checked = []
+    has_partner = Student.has_partner
+    Student.has_partner = lambda s: checked.append(s) or has_partner(s)
+    try:
+        group = replay_run(60, 2025, 0, preferences="worst_case")
+    finally:
+        Student.has_partner = has_partner
+    most = 4 * group.proposal_count
+    assert len(checked) <= most, f'Expected at most {most} partner checks, got {len(checked)}'
+
+    # The students are renumbered in each run, but the instance is the same
+    first = run_experiment(student_count=9, run_count=4, seed=2025, preferences="worst_case")
+    other = run_experiment(student_count=9, run_count=4, seed=2026, preferences="worst_case")
+    assert math.isclose(first["all"], other["all"]), f'Expected {first["all"]}, got {other["all"]}'
+
+    # A Workspace gives the same results as a Group
+    for name in ["identical_lists", "worst_case"]:
+        group = run_experiment(student_count=9, run_count=4, seed=2025, preferences=name)
+        workspace = run_experiment(student_count=9, run_count=4, seed=2025, preferences=name,
+                                   engine="workspace")
+        for key in ["a", "b", "all"]:
+            assert math.isclose(group[key], workspace[key]), f'{name}: expected {group[key]}, got {workspace[key]} for {key}'
+
+    # A benchmark runs random preferences alongside every hard instance
+    results = run_benchmark(8, run_count=2, seed=1)
+    expected = ["random", "identical_lists", "worst_case"]
+    assert expected == list(results), f'Expected {expected}, got {list(results)}'
+    for name, result in results.items():
+        assert name == result["preferences"], f'Expected {name}, got {result["preferences"]}'
+
+    # Lazy preferences can only be random
+    try:
+        run_experiment(student_count=9, run_count=1, engine="lazy", preferences="worst_case")
+        assert False, 'Expected a ValueError'
+    except ValueError:
+        pass
+
+    print("tests for hard preferences passed")
+
+
+# Part 6
+# -------------------------------------------------------------
+
+def test_engines_agree():
+    """
+    Every engine should give the same stable, A-optimal matching on fuzzed instances
+    """
+    # Imported here so that the tests above only need gale_shapley itself
+    import fuzz
+    import instances
+
+    result = fuzz.fuzz(count=500, seed=5)
+    assert [] == result["failures"], '\n'.join(result["failures"][:10])
+
+    # With NumPy, its vectorized rounds are fuzzed too, not just its sequential tail
+    import engines
+    if engines.HAS_NUMPY:
+        assert "numpy:vectorized" in fuzz.available_engines(), 'Expected the vectorized NumPy engine'
+    # Large instances reach the NumPy kernel's default vectorized path; they are slow, so only a few
+    result = fuzz.fuzz(count=6, seed=5, large_every=1)
+    assert [] == result["failures"], '\n'.join(result["failures"][:10])
+    sizes = [len(fuzz.fuzz_instance(5, i, large_every=1)[1].prefs_a) for i in range(6)]
+    assert min(sizes) > 64, f'Expected instances bigger than the NumPy sequential tail, got {sizes}'
+
+    # The hard instances really are as hard as they are meant to be
+    for n in range(1, 12):
+        _, proposals = fuzz._run_group(instances.worst_case_instance(n))
+        expected = n * n - n + 1
+        assert expected == proposals, f'Expected {expected} proposals for n={n}, got {proposals}'
+
+    # A broken engine is caught
+    original = fuzz._run_traced
+    fuzz._run_traced = lambda tables: ([-1] * len(tables.prefs_a), 0)
+    try:
+        family, tables = fuzz.fuzz_instance(5, 0)
+        problems = fuzz.check_instance(family, tables, ["traced"])
+        assert problems, 'Expected the broken engine to be reported'
+    finally:
+        fuzz._run_traced = original
+
+    print("tests for engines agree passed")
+
+
 def test_all():
     test_student_constructor()
     test_student_str()
@@ -464,6 +719,10 @@ def test_all():
     test_make_naive_partnerships()
     test_propose_to_top_choice()
     test_algorithm()
+    test_seeded_experiment()
+    test_progress_monitor()
+    test_hard_preferences()
+    test_engines_agree()
     print('All tests passed!')
 
 
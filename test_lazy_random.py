@@ -0,0 +1,102 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for Gale-Shapley on lazily generated random preferences
+"""
+
+import engines
+import lazy_random
+import math
+import random
+import statistics
+
+
+def test_lazy_shuffles():
+    """
+    Drawing a whole lazy shuffle should give every value exactly once
+    """
+    shuffles = lazy_random._LazyShuffles(3, 10, random.Random(5))
+    for shuffle in range(3):
+        result = sorted(shuffles.draw(shuffle) for _ in range(10))
+        expected = list(range(10))
+        assert expected == result, f'Expected {expected}, got {result}'
+
+    # Every swapped position has been used up, so nothing is left stored
+    assert {} == shuffles._swapped, f'Expected no stored swaps, got {shuffles._swapped}'
+
+    print("tests for lazy shuffles passed")
+
+
+def test_lazy_random_match():
+    """
+    Test cases for lazy_random_match
+    """
+    rng = random.Random(11)
+    for size in [1, 2, 10, 500]:
+        partner_a, proposals, ratings_a, ratings_b = lazy_random.lazy_random_match(size, rng)
+
+        # Everyone is partnered, with exactly one partner
+        expected = list(range(size))
+        result = sorted(partner_a)
+        assert expected == result, f'Expected everyone partnered, got {partner_a}'
+
+        assert size <= proposals <= size * size, f'Impossible proposal count {proposals}'
+        for rating in ratings_a + ratings_b:
+            assert 0 <= rating < size, f'Rating {rating} out of range for size {size}'
+
+    # Random instances make about n*ln(n) proposals, far fewer than n^2
+    size = 2000
+    _, proposals, _, _ = lazy_random.lazy_random_match(size, rng)
+    assert proposals < 2 * size * math.log(size), f'{proposals} proposals is too many for {size} students'
+
+    print("tests for lazy_random_match passed")
+
+
+def test_same_distribution_as_workspace():
+    """
+    Lazily drawn preferences should give the same average results as shuffled ones
+    """
+    size = 40
+    runs = 400
+    rng = random.Random(3)
+    workspace = engines.Workspace(size)
+
+    lazy = {"a": [], "b": [], "proposals": []}
+    shuffled = {"a": [], "b": [], "proposals": []}
+    for _ in range(runs):
+        _, proposals, ratings_a, ratings_b = lazy_random.lazy_random_match(size, rng)
+        happiness = lazy_random.happiness_from_ratings(ratings_a, ratings_b)
+        lazy["a"].append(happiness[0])
+        lazy["b"].append(happiness[1])
+        lazy["proposals"].append(proposals)
+
+        workspace.randomize(rng)
+        shuffled["proposals"].append(workspace.match())
+        happiness = workspace.happiness()
+        shuffled["a"].append(happiness[0])
+        shuffled["b"].append(happiness[1])
+
+    # Compare the means, allowing 5 standard errors of difference
+    for key in lazy:
+        difference = abs(statistics.mean(lazy[key]) - statistics.mean(shuffled[key]))
+        error = math.sqrt((statistics.variance(lazy[key]) + statistics.variance(shuffled[key])) / runs)
+        assert difference < 5 * error, f'{key}: lazy and shuffled means differ by {difference}'
+
+    # The naive version should be fair and about .5 happy
+    _, _, ratings_a, ratings_b = lazy_random.lazy_random_naive(2000, rng)
+    result = lazy_random.happiness_from_ratings(ratings_a, ratings_b)[2]
+    assert math.isclose(0.5, result, abs_tol=0.03), f'Expected about 0.5, got {result}'
+
+    print("tests for lazy distribution passed")
+
+
+def test_all():
+    test_lazy_shuffles()
+    test_lazy_random_match()
+    test_same_distribution_as_workspace()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
@@ -0,0 +1,113 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for the strategic manipulation analysis
+"""
+
+from gale_shapley import Group
+from test_engines import random_tables
+import engines
+import manipulation
+import random
+
+
+def truncated_partner(tables: engines.PreferenceTables, b: int, keep: int) -> int:
+    """
+    Returns B student b's partner after a full rerun with only their top keep choices listed
+    """
+    prefs_b = [pref[:] for pref in tables.prefs_b]
+    prefs_b[b] = prefs_b[b][:keep]
+    partner_a, _ = engines.gale_shapley_python(engines.PreferenceTables(tables.prefs_a, prefs_b))
+    return partner_a.index(b) if b in partner_a else -1
+
+
+def random_instances(n: int, count: int) -> list[engines.PreferenceTables]:
+    """
+    Returns count random instances with n students per group: half complete, half incomplete
+    """
+    instances = [random_tables(n) for _ in range(count // 2)]
+    for _ in range(count - count // 2):
+        prefs_a = [random.sample(range(n), random.randrange(n + 1)) for _ in range(n)]
+        prefs_b = [random.sample(range(n), random.randrange(n + 1)) for _ in range(n)]
+        instances.append(engines.PreferenceTables(prefs_a, prefs_b))
+    return instances
+
+
+def test_against_full_reruns():
+    """
+    The incremental search should find the best truncation a full rerun of every truncation finds
+    """
+    random.seed(10)
+    for n in [2, 4, 7]:
+        for tables in random_instances(n, 30):
+            results = manipulation.find_manipulations(tables)
+            for b, result in enumerate(results):
+                row = tables.ranks_b[b]
+                ratings = []
+                for keep in range(len(tables.prefs_b[b]) + 1):
+                    partner = truncated_partner(tables, b, keep)
+                    ratings.append(row[partner] if partner >= 0 else -1)
+
+                expected = (ratings[-1], max(ratings))
+                got = (result["honest_rating"], result["best_rating"])
+                assert expected == got, f'Expected {expected}, got {got} for B{b}'
+                if result["keep"] is not None:
+                    expected = result["best_partner"]
+                    got = truncated_partner(tables, b, result["keep"])
+                    assert expected == got, f'Expected keep={result["keep"]} to give {expected}, got {got}'
+
+            # The tables should be left as they were
+            expected = engines.PreferenceTables(tables.prefs_a, tables.prefs_b).ranks_b
+            assert expected == tables.ranks_b, 'Expected the tables to be restored'
+
+    print("tests for against full reruns passed")
+
+
+def test_processes():
+    """
+    Splitting the search across processes should give the same results
+    """
+    random.seed(11)
+    tables = random_tables(40)
+    expected = manipulation.find_manipulations(tables)
+    result = manipulation.find_manipulations(tables, processes=2)
+    assert expected == result, 'Expected the same results with 2 processes'
+
+    print("tests for processes passed")
+
+
+def test_manipulation_report():
+    """
+    A B student with an A student who prefers someone else should gain by truncating
+    """
+    group = Group(['Ana', 'Avery'], ['Bailey', 'Bob'])
+    # The classic example: A-proposing gives A their first choices,
+    #   but Bailey can get Avery (their favorite) by refusing Ana
+    group.set_ratings({
+        'Ana': ['Bob', 'Bailey'],
+        'Avery': ['Bailey', 'Bob'],
+        'Bailey': ['Ana', 'Avery'],
+        'Bob': ['Avery', 'Ana'],
+    })
+    report = manipulation.manipulation_report(group)
+
+    names = sorted(entry['name'] for entry in report)
+    assert ['Bailey', 'Bob'] == names, f'Expected Bailey and Bob to gain, got {names}'
+    entry = [entry for entry in report if entry['name'] == 'Bailey'][0]
+    expected = {'name': 'Bailey', 'honest_partner': 'Ana', 'best_partner': 'Avery',
+                'gain': 1, 'partner_ratings': ['Avery']}
+    assert expected == entry, f'Expected {expected}, got {entry}'
+
+    print("tests for manipulation report passed")
+
+
+def test_all():
+    test_against_full_reruns()
+    test_processes()
+    test_manipulation_report()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
@@ -0,0 +1,122 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for reading and writing preferences and matchings
+"""
+
+from gale_shapley import Group
+import engines
+import matching_io
+import os
+import roommates
+import tempfile
+
+
+def test_preferences_round_trip():
+    """
+    Writing a Group's preferences and reading them back should give the same ratings
+    """
+    group = Group(['Ana', 'Avery', 'Abby'], ['Bailey', 'Brian', 'Bob'])
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'prefs.json')
+        matching_io.write_preferences(path, group)
+        loaded = matching_io.group_from_file(path)
+        tables = matching_io.tables_from_file(path)
+
+    for original, result in zip(group.all_students, loaded.all_students):
+        assert original.name == result.name, f'Expected {original.name}, got {result.name}'
+        assert original.partner_ratings == result.partner_ratings, \
+            f'Expected {original.partner_ratings}, got {result.partner_ratings}'
+
+    expected = engines.tables_from_group(group).ranks_b
+    result = tables.ranks_b
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for preferences round trip passed")
+
+
+def test_bad_preferences_file():
+    """
+    A file without both groups should be rejected
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'prefs.json')
+        with open(path, 'w') as f:
+            f.write('{"a": {}}')
+        try:
+            matching_io.read_preferences(path)
+            assert False, 'Expected a ValueError for a file without group b'
+        except ValueError:
+            pass
+
+    print("tests for bad preferences file passed")
+
+
+def test_matching_round_trip():
+    """
+    Writing a matching and reading it back should give the same partners
+    """
+    group = Group(['Ana', 'Avery', 'Abby'], ['Bailey', 'Brian', 'Bob'])
+    group.make_gale_shapely_partnerships()
+    group.students_a[0].break_partnership()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'matching.csv')
+        matching_io.write_matching(path, group)
+        result = matching_io.read_matching(path)
+
+    expected = {a.name: a.partner.name if a.partner else None for a in group.students_a}
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for matching round trip passed")
+
+
+def test_pool_round_trip():
+    """
+    A Pool's preferences and roommate matching should survive being written and read back
+    """
+    pool = roommates.Pool(['Ana', 'Bob', 'Cal', 'Dee'])
+    pool.set_ratings({
+        'Ana': ['Cal', 'Dee', 'Bob'],
+        'Bob': ['Dee', 'Ana', 'Cal'],
+        'Cal': ['Dee', 'Bob', 'Ana'],
+        'Dee': ['Ana', 'Bob', 'Cal'],
+    })
+    pool.make_stable_roommate_partnerships()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'prefs.json')
+        matching_io.write_pool_preferences(path, pool)
+        loaded = matching_io.pool_from_file(path)
+        tables = matching_io.pool_tables_from_file(path)
+        matching_path = os.path.join(folder, 'matching.csv')
+        matching_io.write_roommate_matching(matching_path, pool)
+        matching = matching_io.read_matching(matching_path)
+
+    expected = [s.partner_ratings for s in pool.students]
+    result = [s.partner_ratings for s in loaded.students]
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    expected = roommates.pool_tables(pool).ranks_a
+    result = tables.ranks_a
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    # Each pair is written once
+    expected = {'Ana': 'Dee', 'Bob': 'Cal'}
+    assert expected == matching, f'Expected {expected}, got {matching}'
+
+    print("tests for pool round trip passed")
+
+
+def test_all():
+    test_preferences_round_trip()
+    test_bad_preferences_file()
+    test_matching_round_trip()
+    test_pool_round_trip()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
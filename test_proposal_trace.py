@@ -0,0 +1,142 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for recording and replaying proposal traces
+"""
+
+from test_engines import make_test_group, random_tables
+import contextlib
+import engines
+import io
+import os
+import proposal_trace
+import random
+import tempfile
+
+
+def test_group_trace():
+    """
+    Replaying a Group's trace should give its final partnerships and proposal count
+    """
+    group = make_test_group()
+    trace = proposal_trace.trace_for_group(group)
+    group.make_gale_shapely_partnerships(trace)
+
+    expected = [group.students_b.index(a.partner) for a in group.students_a]
+    result, _ = trace.state_at()
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    expected = group.proposal_count
+    result = trace.proposal_count()
+    assert expected == result, f'Expected {expected} proposals, got {result}'
+
+    # Before anything happens, nobody is partnered
+    expected = [-1] * 5
+    result, _ = trace.state_at(0)
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for group trace passed")
+
+
+def test_engine_trace():
+    """
+    The pure-Python engine and a Workspace should record traces that replay to their results
+    """
+    random.seed(3)
+    tables = random_tables(60)
+    trace = proposal_trace.trace_for_tables(tables, capacity=1)
+    partner_a, proposals = engines.gale_shapley_python(tables, trace)
+
+    result, _ = trace.state_at()
+    assert partner_a == result, f'Expected {partner_a}, got {result}'
+    assert proposals == trace.proposal_count(), \
+        f'Expected {proposals} proposals, got {trace.proposal_count()}'
+
+    # Every intermediate state should be a valid partial matching
+    for step in range(0, trace.count, 7):
+        partner_a, partner_b = trace.state_at(step)
+        for i, j in enumerate(partner_a):
+            assert j < 0 or partner_b[j] == i, f'Inconsistent partners at step {step}'
+
+    workspace = engines.Workspace(30)
+    workspace.randomize(random.Random(1))
+    trace = proposal_trace.ProposalTrace([str(i) for i in range(30)], [str(j) for j in range(30)])
+    proposals = workspace.match(trace)
+    result, _ = trace.state_at()
+    assert workspace.partner_a == result, f'Expected {workspace.partner_a}, got {result}'
+    assert proposals == trace.proposal_count(), \
+        f'Expected {proposals} proposals, got {trace.proposal_count()}'
+
+    print("tests for engine trace passed")
+
+
+def test_history():
+    """
+    A student's history should only contain their own events, in order
+    """
+    group = make_test_group()
+    trace = proposal_trace.trace_for_group(group)
+    group.make_gale_shapely_partnerships(trace)
+
+    # The first proposal Bailey receives is always accepted, since Bailey is still free
+    bailey = trace.names_b.index('Bailey')
+    history = trace.history(b=bailey)
+    assert history, 'Expected Bailey to receive proposals'
+    steps = [step for step, _, _, _ in history]
+    assert steps == sorted(steps), f'Expected steps in order, got {steps}'
+    assert all(b == bailey for _, _, _, b in history), f'Expected only Bailey, got {history}'
+
+    expected = f"{steps[0]}: {trace.names_a[history[0][2]]} proposed to Bailey, who accepted"
+    result = trace.describe(steps[0])
+    assert expected == result, f'Expected {expected!r}, got {result!r}'
+
+    print("tests for history passed")
+
+
+def test_file_round_trip():
+    """
+    A saved trace should read back identically, and the command line tool should query it
+    """
+    group = make_test_group()
+    trace = proposal_trace.trace_for_group(group)
+    group.make_gale_shapely_partnerships(trace)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'trace.bin')
+        proposal_trace.write_trace(path, trace)
+        loaded = proposal_trace.read_trace(path)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            proposal_trace.main([path, '--student', 'Ana'])
+
+        with open(path, 'rb+') as f:
+            f.truncate(os.path.getsize(path) - 1)
+        try:
+            proposal_trace.read_trace(path)
+            assert False, 'Expected a ValueError for a truncated trace'
+        except ValueError:
+            pass
+
+    assert trace.records() == loaded.records(), 'Expected the same records after reading back'
+    assert trace.names_a == loaded.names_a, f'Expected {trace.names_a}, got {loaded.names_a}'
+
+    lines = output.getvalue().splitlines()
+    expected = 1 + len(trace.history(a=0))
+    assert expected == len(lines), f'Expected {expected} lines, got {lines}'
+    assert all('Ana' in line for line in lines[1:]), f'Expected only Ana, got {lines}'
+
+    print("tests for file round trip passed")
+
+
+def test_all():
+    test_group_trace()
+    test_engine_trace()
+    test_history()
+    test_file_round_trip()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
@@ -0,0 +1,148 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for the stable roommates engine
+"""
+
+from engines import PreferenceTables
+from gale_shapley import calculate_average_happiness
+import random
+import roommates
+
+
+def brute_force_stable_exists(prefs: list[list[int]]) -> bool:
+    """
+    Returns whether any perfect matching of the pool has no blocking pairs
+    """
+    n = len(prefs)
+    tables = PreferenceTables(prefs, prefs)
+
+    def search(partner):
+        if -1 not in partner:
+            return not roommates.roommate_blocking_pairs(tables, partner)
+        i = partner.index(-1)
+        for j in prefs[i]:
+            if partner[j] == -1 and j != i and i in prefs[j]:
+                partner[i], partner[j] = j, i
+                if search(partner):
+                    return True
+                partner[i] = partner[j] = -1
+        return False
+
+    return search([-1] * n)
+
+
+def random_prefs(n: int, rng: random.Random, keep: float = 1.0) -> list[list[int]]:
+    """
+    Returns random preference lists for a pool of n, each keeping about that fraction of the others
+    """
+    prefs = []
+    for i in range(n):
+        others = [j for j in range(n) if j != i and rng.random() < keep]
+        rng.shuffle(others)
+        prefs.append(others)
+    return prefs
+
+
+def test_no_stable_matching():
+    """
+    The classic instance where everyone likes 3 least should have no stable matching
+    """
+    prefs = [[1, 2, 3], [2, 0, 3], [0, 1, 3], [0, 1, 2]]
+    result = roommates.stable_roommates(PreferenceTables(prefs, prefs))
+    assert result is None, f'Expected no stable matching, got {result}'
+
+    prefs = [[1, 2], [2, 0], [0, 1]]
+    result = roommates.stable_roommates(PreferenceTables(prefs, prefs))
+    assert result is None, f'Expected no matching for an odd pool, got {result}'
+
+    print("tests for no stable matching passed")
+
+
+def test_against_brute_force():
+    """
+    Irving's algorithm should find a stable matching exactly when one exists
+    """
+    rng = random.Random(5)
+    for n in [2, 4, 6, 8]:
+        for keep in [1.0, 0.7]:
+            for _ in range(60):
+                prefs = random_prefs(n, rng, keep)
+                tables = PreferenceTables(prefs, prefs)
+                expected = brute_force_stable_exists(prefs)
+                partner = roommates.stable_roommates(tables)
+                result = partner is not None
+                assert expected == result, f'Expected stable={expected}, got {partner} for {prefs}'
+                if partner is None:
+                    continue
+
+                for i, j in enumerate(partner):
+                    assert partner[j] == i and j in prefs[i], f'Bad partners {partner} for {prefs}'
+                blocking = roommates.roommate_blocking_pairs(tables, partner)
+                assert [] == blocking, f'Expected no blocking pairs, got {blocking} for {prefs}'
+
+    print("tests for against brute force passed")
+
+
+def test_large_pool():
+    """
+    Bigger pools should still give stable matchings when they exist
+    """
+    rng = random.Random(2)
+    found = 0
+    for _ in range(10):
+        prefs = random_prefs(200, rng)
+        tables = PreferenceTables(prefs, prefs)
+        partner = roommates.stable_roommates(tables)
+        if partner is None:
+            continue
+        found += 1
+        blocking = roommates.roommate_blocking_pairs(tables, partner)
+        assert [] == blocking, f'Expected no blocking pairs, got {blocking}'
+    assert found > 0, 'Expected some random pools to have a stable matching'
+
+    print("tests for large pool passed")
+
+
+def test_pool():
+    """
+    A Pool should partner everyone up stably, or nobody if that is impossible
+    """
+    names = ['Ana', 'Bob', 'Cal', 'Dee']
+    pool = roommates.Pool(names)
+    pool.set_ratings({
+        'Ana': ['Dee', 'Cal', 'Bob'],
+        'Bob': ['Dee', 'Ana', 'Cal'],
+        'Cal': ['Dee', 'Bob', 'Ana'],
+        'Dee': ['Cal', 'Bob', 'Ana'],
+    })
+    result = pool.make_stable_roommate_partnerships()
+    assert result is False, 'Expected no stable matching'
+    assert len(pool.get_unpartnered()) == 4, 'Expected nobody to be partnered'
+
+    pool.set_ratings({'Dee': ['Ana', 'Bob', 'Cal'], 'Ana': ['Cal', 'Dee', 'Bob']})
+    result = pool.make_stable_roommate_partnerships()
+    assert result is True, 'Expected a stable matching'
+    expected = {'Ana': 'Dee', 'Bob': 'Cal', 'Cal': 'Bob', 'Dee': 'Ana'}
+    result = {s.name: s.partner.name for s in pool.students}
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    # 'Bob' gets their top choice, 'Ana' and 'Cal' their second, 'Dee' their last
+    expected = (1 + 2 + 1 + 0) / (4 * 2)
+    result = calculate_average_happiness(pool.students)
+    assert expected == result, f'Expected happiness {expected}, got {result}'
+
+    print("tests for pool passed")
+
+
+def test_all():
+    test_no_stable_matching()
+    test_against_brute_force()
+    test_large_pool()
+    test_pool()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()
@@ -0,0 +1,101 @@
+"""
+Author: Jason Yang
+Starting Date: 05/14/2025
+
+Test cases for the sharded message-passing engine
+"""
+
+from test_engines import random_tables
+import array
+import engines
+import random
+import sharded
+import socket
+import threading
+
+
+def test_shard_starts():
+    """
+    Shards should cover group B in contiguous, nearly equal slices
+    """
+    expected = [0, 3, 6, 10]
+    result = sharded.shard_starts(10, 3)
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    expected = [0, 0, 1, 1, 2]
+    result = sharded.shard_starts(2, 4)
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for shard_starts passed")
+
+
+def test_in_process():
+    """
+    Sharded matching should give the single-node A-optimal matching and proposal count
+    """
+    random.seed(8)
+    for n, shards in [(1, 1), (5, 2), (40, 3), (40, 7), (3, 5)]:
+        tables = random_tables(n)
+        expected = engines.gale_shapley_python(tables)
+        with sharded.InProcessTransport(shards) as transport:
+            result = sharded.sharded_gale_shapley(tables, transport)
+        assert expected == result, f'Expected {expected}, got {result} for n={n}, shards={shards}'
+
+    # Incomplete lists and groups of different sizes
+    prefs_a = [random.sample(range(7), random.randrange(8)) for _ in range(9)]
+    prefs_b = [random.sample(range(9), random.randrange(10)) for _ in range(7)]
+    tables = engines.PreferenceTables(prefs_a, prefs_b)
+    expected = engines.gale_shapley_python(tables)
+    with sharded.InProcessTransport(3) as transport:
+        result = sharded.sharded_gale_shapley(tables, transport)
+    assert expected == result, f'Expected {expected}, got {result} for incomplete lists'
+
+    print("tests for in process passed")
+
+
+def test_local_processes():
+    """
+    Shards in separate processes, talking over sockets, should give the same matching
+    """
+    random.seed(9)
+    tables = random_tables(120)
+    expected = engines.gale_shapley_python(tables)
+    result = sharded.match_sharded(tables, shard_count=3)
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for local processes passed")
+
+
+def test_frames():
+    """
+    Frames should arrive intact, and their length field should allow frames over 4 GiB
+    """
+    ours, theirs = socket.socketpair()
+    with ours, theirs:
+        for values in [array.array("i"), array.array("i", range(-5, 100000))]:
+            # Sent from another thread, since a big frame fills the socket buffer
+            sender = threading.Thread(target=sharded.send_frame, args=(ours, sharded.PROPOSE, values))
+            sender.start()
+            kind, result = sharded.receive_frame(theirs)
+            sender.join()
+            assert (sharded.PROPOSE, values) == (kind, result), f'Frame of {len(values)} values changed'
+
+    # A LOAD for one shard of 50,000 x 50,000 students is about 10 GB
+    size = 50_000 * 50_000 * 4
+    expected = (size, sharded.LOAD)
+    result = sharded._FRAME.unpack(sharded._FRAME.pack(size, sharded.LOAD))
+    assert expected == result, f'Expected {expected}, got {result}'
+
+    print("tests for frames passed")
+
+
+def test_all():
+    test_shard_starts()
+    test_in_process()
+    test_local_processes()
+    test_frames()
+    print('All tests passed!')
+
+
+if __name__ == "__main__":
+    test_all()